@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 from typing import Tuple, List, Optional
 import subprocess
 import os
+import re
+import tempfile
 
 import numpy as np
 import soundfile as sf
@@ -11,6 +14,7 @@ import soundfile as sf
 from app import config
 
 
+@lru_cache(maxsize=1)
 def _ffmpeg_exe() -> str:
     bundled = config.FFMPEG_DIR / "ffmpeg.exe"
     if bundled.exists():
@@ -69,13 +73,194 @@ def decode_to_wav(
     return out_wav_path, warnings
 
 
+_PCM_READ_CHUNK = 1 << 20  # bytes per read from the FFmpeg pipe
+_STDERR_TAIL_BYTES = 8192  # end of FFmpeg's stderr kept for decode error messages
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def probe_duration_sec(input_path: Path) -> Optional[float]:
+    """
+    Best-effort media duration from FFmpeg's input banner (no ffprobe needed).
+    """
+    try:
+        proc = subprocess.run(
+            [_ffmpeg_exe(), "-hide_banner", "-nostdin", "-i", str(input_path)],
+            capture_output=True,
+            text=True,
+            check=False,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
+        )
+    except OSError:
+        return None
+    m = _DURATION_RE.search(proc.stderr or "")
+    if not m:
+        return None
+    h, mnt, sec = m.groups()
+    return int(h) * 3600 + int(mnt) * 60 + float(sec)
+
+
+def _ffmpeg_read_into(cmd: List[str], input_path: Path, buf: bytearray, grow: int) -> int:
+    """
+    Run an FFmpeg command that writes raw PCM to stdout, reading it in fixed-size
+    chunks straight into buf (extended by half its size plus grow bytes whenever it
+    fills up). Returns the number of bytes filled.
+    """
+    # stderr goes to a temp file, not a pipe: a corrupt file can log more than the pipe
+    # buffer holds, and ffmpeg would then block on stderr while we block on stdout
+    err_file = tempfile.TemporaryFile()
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=err_file,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
+        )
+    except FileNotFoundError:
+        err_file.close()
+        raise RuntimeError(
+            "FFmpeg not found. Put ffmpeg.exe in assets/ffmpeg/ (and required bin files) or install FFmpeg on PATH."
+        )
+
+    filled = 0
+    with err_file, proc:
+        while True:
+            if filled == len(buf):
+                buf.extend(bytes(len(buf) // 2 + grow))
+            with memoryview(buf) as view:
+                k = proc.stdout.readinto(view[filled:filled + _PCM_READ_CHUNK])
+            if not k:
+                break
+            filled += k
+        proc.wait()
+        # Only the tail matters for the error message
+        err_file.seek(max(0, err_file.seek(0, os.SEEK_END) - _STDERR_TAIL_BYTES))
+        stderr = err_file.read()
+
+    if proc.returncode != 0:
+        err = (stderr or b"").decode("utf-8", errors="replace").strip()
+        raise RuntimeError(
+            "FFmpeg failed to decode:\n"
+            f"Input: {input_path}\n"
+            f"Command: {' '.join(cmd)}\n\n"
+            f"{err}"
+        )
+    return filled
+
+
+def decode_to_pcm(
+    input_path: Path,
+    target_sr: int = 16000,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Decode any audio (mp3/wav/etc.) straight to mono float32 samples using FFmpeg.
+    FFmpeg writes raw f32le to stdout, which is read in fixed-size chunks into a
+    buffer preallocated from the probed duration, so peak memory stays ~1x the audio.
+    """
+    warnings: List[str] = []
+
+    if not input_path.exists():
+        raise FileNotFoundError(str(input_path))
+
+    cmd = [
+        _ffmpeg_exe(),
+        "-nostdin",
+        "-loglevel", "error",
+        "-i", str(input_path),
+        "-ac", "1",
+        "-ar", str(target_sr),
+        "-vn",
+        "-f", "f32le",
+        "-",
+    ]
+
+    duration = probe_duration_sec(input_path)
+    # One second of slack so a slightly short probe doesn't force a regrow
+    est_frames = max(int(((duration or 0.0) + 1.0) * target_sr), target_sr)
+    buf = bytearray(est_frames * 4)
+    filled = _ffmpeg_read_into(cmd, input_path, buf, grow=target_sr * 4)
+
+    # View the filled samples without copying; clip then works in place on buf
+    audio = np.frombuffer(buf, dtype="<f4", count=filled // 4).astype(np.float32, copy=False)
+    np.clip(audio, -1.0, 1.0, out=audio)
+    return audio, warnings
+
+
+def decode_to_s16le(
+    input_path: Path,
+    sample_rate: int = 48000,
+    channels: int = 2,
+    duration_sec: Optional[float] = None,
+    wav_path: Optional[Path] = None,
+    wav_sr: int = 16000,
+) -> bytearray:
+    """
+    Decode any audio to interleaved signed 16-bit PCM for direct playback
+    (e.g. through a QAudioSink), using FFmpeg.
+
+    FFmpeg's output is read straight into one buffer sized from duration_sec
+    (probed if not given), so the PCM is held in memory once, not once per pipe
+    read plus a joined copy. If wav_path is given, the same FFmpeg run also writes
+    a mono WAV at wav_sr there (as decode_to_wav would), so the file is decoded once.
+    """
+    if not input_path.exists():
+        raise FileNotFoundError(str(input_path))
+
+    cmd = [
+        _ffmpeg_exe(),
+        "-y",
+        "-nostdin",
+        "-loglevel", "error",
+        "-i", str(input_path),
+        "-ac", str(channels),
+        "-ar", str(sample_rate),
+        "-vn",
+        "-f", "s16le",
+        "-",
+    ]
+    if wav_path is not None:
+        wav_path.parent.mkdir(parents=True, exist_ok=True)
+        cmd += ["-ac", "1", "-ar", str(wav_sr), "-vn", str(wav_path)]
+
+    if duration_sec is None:
+        duration_sec = probe_duration_sec(input_path)
+    frame = 2 * channels
+    # One second of slack so a slightly short probe doesn't force a regrow
+    buf = bytearray(int(((duration_sec or 0.0) + 1.0) * sample_rate) * frame)
+    filled = _ffmpeg_read_into(cmd, input_path, buf, grow=sample_rate * frame)
+
+    # Trim in place to whole frames
+    del buf[filled // frame * frame:]
+    return buf
+
+
 def load_wav_mono_float32(wav_path: Path) -> Tuple[np.ndarray, int]:
     """
     Load decoded WAV into mono float32 audio.
     """
     audio, sr = sf.read(str(wav_path), dtype="float32", always_2d=False)
     if isinstance(audio, np.ndarray) and audio.ndim > 1:
-        audio = audio.mean(axis=1).astype(np.float32)
+        mono = np.empty(audio.shape[0], dtype=np.float32)
+        np.mean(audio, axis=1, dtype=np.float32, out=mono)
+        audio = mono
     audio = np.asarray(audio, dtype=np.float32)
-    audio = np.clip(audio, -1.0, 1.0)
+    np.clip(audio, -1.0, 1.0, out=audio)
     return audio, sr
+
+
+def load_audio_mono(input_path: Path, target_sr: int = 16000) -> Tuple[np.ndarray, int, List[str]]:
+    """
+    Load any audio as mono float32 at target_sr.
+    WAV/FLAC files that are already mono at target_sr are read directly with
+    soundfile; everything else goes through FFmpeg.
+    """
+    if input_path.suffix.lower() in (".wav", ".flac"):
+        try:
+            info = sf.info(str(input_path))
+        except Exception:
+            info = None
+        if info is not None and info.samplerate == target_sr and info.channels == 1:
+            audio, sr = load_wav_mono_float32(input_path)
+            return audio, sr, []
+
+    audio, warnings = decode_to_pcm(input_path, target_sr=target_sr)
+    return audio, target_sr, warnings
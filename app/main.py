@@ -15,6 +15,7 @@ def main() -> int:
         pass
 
     app = QApplication(sys.argv)
+    app.setApplicationName("WaveNotes")  # names the per-user cache folder
     app.setStyle("Fusion")  # <-- add this    
     
     def configure_torch_cache():
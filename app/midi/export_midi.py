@@ -1,52 +1,160 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
-
-from app.state import NoteEvent
-
-
-def export_midi(notes: List[NoteEvent], out_path: Path, tempo_bpm: int = 120) -> None:
-    try:
-        import mido
-    except Exception as e:
-        raise RuntimeError("Missing dependency 'mido'. Install with: pip install mido") from e
-
-    ticks_per_beat = 480
-    midi = mido.MidiFile(ticks_per_beat=ticks_per_beat)
-    track = mido.MidiTrack()
-    midi.tracks.append(track)
-
-    tempo = mido.bpm2tempo(max(1, int(tempo_bpm)))
-    track.append(mido.MetaMessage("set_tempo", tempo=tempo, time=0))
-
-    events = []
-    for n in notes:
-        st = float(n.start_sec)
-        en = float(n.end_sec)
-        pitch = int(n.midi_pitch)
-        vel = int(n.velocity)
-        events.append((st, 0, ("on", pitch, vel)))
-        events.append((en, -1, ("off", pitch, 0)))
-
-    events.sort(key=lambda x: (x[0], x[1]))
-
-    def sec_to_ticks(sec: float) -> int:
-        bpm = max(1, int(tempo_bpm))
-        beats = sec / (60.0 / bpm)
-        return int(round(beats * ticks_per_beat))
-
-    last_tick = 0
-    for t_sec, _, payload in events:
-        tick = sec_to_ticks(t_sec)
-        delta = max(0, tick - last_tick)
-        last_tick = tick
-
-        kind, pitch, vel = payload
-        if kind == "on":
-            track.append(mido.Message("note_on", note=pitch, velocity=vel, time=delta))
-        else:
-            track.append(mido.Message("note_off", note=pitch, velocity=0, time=delta))
-
-    track.append(mido.MetaMessage("end_of_track", time=1))
-    midi.save(str(out_path))
+from typing import Dict, Iterable, List, Optional, Tuple
+import struct
+
+import numpy as np
+
+from app.state import NoteEvent, notes_to_arrays
+
+
+def _note_event_arrays(
+    notes: Iterable[NoteEvent], ticks_per_sec: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flatten notes into time-ordered on/off events.
+    Returns (kinds, pitches, velocities, delta_ticks); kind 1 = note_on, 0 = note_off.
+    """
+    starts, ends, note_pitches, note_vels = notes_to_arrays(list(notes))
+    n = starts.size
+
+    # Round to ticks before sorting: offs must sort before ons at equal *ticks*, so
+    # a re-struck pitch isn't cut short when both times round to the same tick
+    # (clamped at 0: a negative time would otherwise shift every later event).
+    # Each note keeps at least one tick, so its own off can't sort ahead of its on.
+    on_ticks = np.maximum(np.rint(starts * ticks_per_sec).astype(np.int64), 0)
+    off_ticks = np.maximum(np.rint(ends * ticks_per_sec).astype(np.int64), on_ticks + 1)
+
+    # Interleave each note's on/off into preallocated event arrays
+    ticks = np.empty(2 * n, dtype=np.int64)
+    ticks[0::2] = on_ticks
+    ticks[1::2] = off_ticks
+    pitches = np.clip(np.repeat(note_pitches, 2), 0, 127)
+    vels = np.zeros(2 * n, dtype=np.int32)
+    # note_on with velocity 0 means note_off, so a note keeps at least velocity 1
+    vels[0::2] = np.clip(note_vels, 1, 127)
+    kinds = np.tile(np.array([1, 0], dtype=np.int8), n)
+    order = np.lexsort((kinds, ticks))
+
+    # Sorted non-negative integer ticks, so every delta is already >= 0
+    deltas = np.diff(ticks[order], prepend=0)
+    return kinds[order], pitches[order], vels[order], deltas
+
+
+# Standard MIDI File bytes are written directly: one mido Message object per note
+# event made large exports slow, and the format is only a few byte patterns.
+_TICKS_PER_BEAT = 480
+_DEFAULT_TEMPO_BPM = 120
+
+
+def _vlq(value: int) -> bytes:
+    """MIDI variable-length quantity: 7 bits per byte, high bit set on all but the last."""
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def _meta(kind: int, data: bytes, delta: int = 0) -> bytes:
+    return _vlq(delta) + bytes((0xFF, kind)) + _vlq(len(data)) + data
+
+
+def _tempo_meta(bpm: int) -> bytes:
+    tempo = int(round(60 * 1e6 / max(1, int(bpm))))  # microseconds per quarter (mido.bpm2tempo)
+    return _meta(0x51, tempo.to_bytes(3, "big"))
+
+
+def _track_name_meta(name: str) -> bytes:
+    return _meta(0x03, str(name).encode("latin-1", errors="replace"))
+
+
+def _note_events_bytes(kinds: np.ndarray, pitches: np.ndarray, vels: np.ndarray, deltas: np.ndarray) -> bytes:
+    """
+    Encode _note_event_arrays output (already clamped to MIDI data-byte ranges) as
+    channel-0 note_on/note_off track events in one NumPy pass. Uses running status
+    (the status byte is dropped when it repeats), as mido does, so files match what
+    mido.MidiFile.save wrote.
+    """
+    count = deltas.size
+    if count == 0:
+        return b""
+    if int(deltas.max()) > 0x0FFFFFFF:
+        raise ValueError("MIDI delta time too large")
+
+    nbytes = 1 + (deltas > 0x7F) + (deltas > 0x3FFF) + (deltas > 0x1FFFFF)
+    status = np.where(kinds == 1, 0x90, 0x80)
+    with_status = np.ones(count, dtype=bool)
+    with_status[1:] = status[1:] != status[:-1]
+
+    sizes = nbytes + with_status + 2
+    begins = np.cumsum(sizes) - sizes
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+
+    # Delta VLQ, most significant 7-bit group first
+    for k in range(4):
+        m = nbytes > k
+        remaining = nbytes[m] - 1 - k
+        out[begins[m] + k] = ((deltas[m] >> (7 * remaining)) & 0x7F) | np.where(remaining > 0, 0x80, 0)
+
+    pos = begins + nbytes
+    out[pos[with_status]] = status[with_status]
+    pos += with_status
+    out[pos] = pitches
+    out[pos + 1] = vels
+    return out.tobytes()
+
+
+def _end_of_track(delta: int = 0) -> bytes:
+    return _meta(0x2F, b"", delta)
+
+
+def encode_track(
+    notes: Iterable[NoteEvent],
+    ticks_per_sec: float,
+    tempo_bpm: Optional[int] = None,
+    name: Optional[str] = None,
+    program: Optional[int] = None,
+    end_delta: int = 0,
+) -> bytes:
+    """
+    One MTrk body for write_smf: optional tempo, track name and program change at
+    tick 0, the notes as channel-0 note_on/note_off events, then end-of-track
+    end_delta ticks after the last note event.
+    """
+    head = b""
+    if tempo_bpm is not None:
+        head += _tempo_meta(tempo_bpm)
+    if name is not None:
+        head += _track_name_meta(name)
+    if program is not None:
+        head += bytes((0x00, 0xC0, int(program) & 0x7F))
+    return head + _note_events_bytes(*_note_event_arrays(notes, ticks_per_sec)) + _end_of_track(end_delta)
+
+
+def write_smf(out_path: Path, tracks: List[bytes], ticks_per_beat: int = _TICKS_PER_BEAT) -> None:
+    """Write a format-1 MIDI file from encode_track() bodies."""
+    chunks = [b"MThd", struct.pack(">IHHH", 6, 1, len(tracks), ticks_per_beat)]
+    for body in tracks:
+        chunks += [b"MTrk", struct.pack(">I", len(body)), body]
+    Path(out_path).write_bytes(b"".join(chunks))
+
+
+def export_midi(notes: List[NoteEvent], out_path: Path, tempo_bpm: int = _DEFAULT_TEMPO_BPM) -> None:
+    bpm = max(1, int(tempo_bpm))
+    # The one-tick gap before end-of-track matches the files mido used to write
+    write_smf(out_path, [encode_track(notes, _TICKS_PER_BEAT * bpm / 60.0, tempo_bpm=bpm, end_delta=1)])
+
+
+def export_multitrack_midi(notes_by_stem: Dict[str, List[NoteEvent]], out_path: Path, tempo_bpm: int = _DEFAULT_TEMPO_BPM) -> None:
+    """Write a single MIDI with a tempo track plus one track per stem."""
+    bpm = max(1, int(tempo_bpm))
+    ticks_per_sec = _TICKS_PER_BEAT * bpm / 60.0
+    tracks = [encode_track([], ticks_per_sec, tempo_bpm=bpm)]
+    for stem_name, notes in notes_by_stem.items():
+        tracks.append(encode_track(notes, ticks_per_sec, name=stem_name))
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    write_smf(out_path, tracks)
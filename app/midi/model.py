@@ -1,11 +1,4 @@
 from __future__ import annotations
-from dataclasses import dataclass
 
-
-@dataclass(frozen=True)
-class NoteEvent:
-    start_sec: float
-    end_sec: float
-    midi_pitch: int
-    velocity: int = 96
-    channel: int = 0  # 0-15
+# NoteEvent lives in app.state; re-exported here for existing imports.
+from app.state import NoteEvent
@@ -2,11 +2,14 @@ from __future__ import annotations
 
 from pathlib import Path
 from typing import List
-import math
 import wave
-import struct
 
-from app.state import NoteEvent
+import numpy as np
+
+from app.state import NoteEvent, NoteArrays, notes_to_arrays
+
+
+_WRITE_CHUNK = 1 << 20  # samples per writeframes() call
 
 
 def midi_to_hz(midi: int) -> float:
@@ -14,10 +17,19 @@ def midi_to_hz(midi: int) -> float:
 
 
 def render_preview_wav(notes: List[NoteEvent], out_path: Path, sr: int = 44100) -> None:
+    render_preview_wav_arrays(notes_to_arrays(notes), out_path, sr=sr)
+
+
+def render_preview_wav_arrays(arrays: NoteArrays, out_path: Path, sr: int = 44100) -> None:
+    """
+    render_preview_wav on (starts, ends, pitches, vels) arrays, so callers that
+    already hold the columns skip the per-note attribute reads.
+    """
     sr = int(sr)
     sr = 44100 if sr <= 0 else sr
 
-    if not notes:
+    starts, ends, pitches, vels = arrays
+    if not len(starts):
         with wave.open(str(out_path), "wb") as wf:
             wf.setnchannels(1)
             wf.setsampwidth(2)
@@ -25,43 +37,47 @@ def render_preview_wav(notes: List[NoteEvent], out_path: Path, sr: int = 44100)
             wf.writeframes(b"\x00\x00" * int(sr * 0.1))
         return
 
-    start0 = min(n.start_sec for n in notes)
-    end1 = max(n.end_sec for n in notes)
+    start0 = float(starts.min())
+    end1 = float(ends.max())
     length = max(0.1, end1 - start0)
     n_samples = int(length * sr)
 
-    buf = [0.0] * n_samples
+    buf = np.zeros(n_samples, dtype=np.float32)
 
-    for n in notes:
-        st = int(max(0.0, n.start_sec - start0) * sr)
-        en = int(max(0.0, n.end_sec - start0) * sr)
+    attack = int(0.01 * sr)
+    release = int(0.03 * sr)
+
+    for start, end, pitch, vel in zip(starts.tolist(), ends.tolist(), pitches.tolist(), vels.tolist()):
+        st = int(max(0.0, start - start0) * sr)
+        en = int(max(0.0, end - start0) * sr)
         en = min(en, n_samples)
         if en <= st:
             continue
-        hz = midi_to_hz(n.midi_pitch)
-        amp = max(0.05, min(1.0, n.velocity / 127.0)) * 0.25
-
-        attack = int(0.01 * sr)
-        release = int(0.03 * sr)
-        for i in range(st, en):
-            t = (i - st) / sr
-            s = math.sin(2.0 * math.pi * hz * t)
-            env = 1.0
-            if i - st < attack:
-                env = (i - st) / max(1, attack)
-            if en - i < release:
-                env = min(env, (en - i) / max(1, release))
-            buf[i] += s * amp * env
-
-    peak = max(1e-9, max(abs(x) for x in buf))
-    norm = 0.95 / peak
-    pcm = bytearray()
-    for x in buf:
-        v = int(max(-32767, min(32767, x * norm * 32767)))
-        pcm += struct.pack("<h", v)
+        hz = midi_to_hz(pitch)
+        amp = max(0.05, min(1.0, vel / 127.0)) * 0.25
+
+        # Linear attack/release ramps over the note's own sample range
+        count = en - st
+        env = np.ones(count, dtype=np.float32)
+        a = min(attack, count)
+        r = min(release, count)
+        if a > 0:
+            env[:a] = np.arange(a, dtype=np.float32) / max(1, attack)
+        if r > 0:
+            env[-r:] = np.minimum(env[-r:], np.arange(r, 0, -1, dtype=np.float32) / max(1, release))
+
+        phase = (2.0 * np.pi * hz / sr) * np.arange(count, dtype=np.float64)
+        buf[st:en] += np.sin(phase).astype(np.float32) * (amp * env)
+
+    peak = max(1e-9, float(np.abs(buf).max()))
+    scale = (0.95 / peak) * 32767
 
+    # Convert and write in fixed-size chunks so the full PCM byte buffer is never materialized
     with wave.open(str(out_path), "wb") as wf:
         wf.setnchannels(1)
         wf.setsampwidth(2)
         wf.setframerate(sr)
-        wf.writeframes(pcm)
+        for i in range(0, n_samples, _WRITE_CHUNK):
+            chunk = buf[i:i + _WRITE_CHUNK] * scale
+            np.clip(chunk, -32767, 32767, out=chunk)
+            wf.writeframes(chunk.astype("<i2").tobytes())
@@ -2,8 +2,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Iterable
 
-import pretty_midi
-
+from app.midi.export_midi import _DEFAULT_TEMPO_BPM, _TICKS_PER_BEAT, encode_track, write_smf
 from app.midi.model import NoteEvent
 
 
@@ -12,17 +11,8 @@ def write_midi(note_events: Iterable[NoteEvent], out_path: Path, program: int =
     Writes a single-track MIDI file.
     program: General MIDI program number (0 = Acoustic Grand Piano)
     """
-    pm = pretty_midi.PrettyMIDI()
-    inst = pretty_midi.Instrument(program=program)
-
-    for n in note_events:
-        start = max(0.0, float(n.start_sec))
-        end = max(start + 0.001, float(n.end_sec))
-        pitch = int(max(0, min(127, n.midi_pitch)))
-        vel = int(max(1, min(127, n.velocity)))
-
-        inst.notes.append(pretty_midi.Note(velocity=vel, pitch=pitch, start=start, end=end))
-
-    pm.instruments.append(inst)
+    bpm = _DEFAULT_TEMPO_BPM
+    # encode_track clamps times, pitches and velocities into range
+    track = encode_track(note_events, _TICKS_PER_BEAT * bpm / 60.0, tempo_bpm=bpm, program=program, end_delta=1)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    pm.write(str(out_path))
+    write_smf(out_path, [track])
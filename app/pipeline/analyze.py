@@ -1,23 +1,40 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from operator import attrgetter
 from pathlib import Path
 from typing import List, Tuple, Optional
 import inspect
 import subprocess
 import tempfile
+import threading
 
 import mido
+import soundfile as sf
 
-from app import config
+from app.audio.io import _ffmpeg_exe
 from app.midi.model import NoteEvent
 
 
+# Stems are transcribed concurrently (TranscribeStemsWorker). They share one loaded
+# Basic Pitch model instead of each loading its own, and at most this many run
+# inference at once so activation memory stays bounded.
+_BASIC_PITCH_SLOTS = threading.BoundedSemaphore(2)
+_BASIC_PITCH_MODEL_LOCK = threading.Lock()
+_basic_pitch_models: dict = {}  # model dir -> basic_pitch.inference.Model
+
+
 # -----------------------------
 # Public API
 # -----------------------------
 
-def analyze_audio(input_path: Path) -> Tuple[List[NoteEvent], int, List[str]]:
+class AnalysisCancelled(Exception):
+    pass
+
+
+def analyze_audio(
+    input_path: Path, cancel: Optional[threading.Event] = None
+) -> Tuple[List[NoteEvent], int, List[str]]:
     """
     Analyze/transcribe audio to a list of NoteEvent using Basic Pitch.
     Returns: (notes, sample_rate, warnings)
@@ -26,6 +43,8 @@ def analyze_audio(input_path: Path) -> Tuple[List[NoteEvent], int, List[str]]:
     - We decode MP3/etc -> WAV via FFmpeg first (reliable).
     - Basic Pitch produces a MIDI file; we read it back into NoteEvents.
     - If anything fails, we return dummy notes and log the real error in warnings.
+    - If cancel gets set, AnalysisCancelled is raised at the next stage boundary
+      (Basic Pitch itself can't be interrupted once it's running).
     """
     warnings: List[str] = []
     sr_out = 44100  # this return value isn't critical for MIDI, but keep stable
@@ -39,23 +58,33 @@ def analyze_audio(input_path: Path) -> Tuple[List[NoteEvent], int, List[str]]:
             tmpdir = Path(tmp)
 
             # 1) Decode to WAV (Basic Pitch is safer with WAV than MP3)
-            wav_path = _decode_to_wav(input_path, out_dir=tmpdir, warnings=warnings)
+            _check_cancel(cancel)
+            wav_path = _decode_to_wav(input_path, out_dir=tmpdir, warnings=warnings, cancel=cancel)
 
             # 2) Run Basic Pitch to produce MIDI
+            _check_cancel(cancel)
             midi_path = _run_basic_pitch(wav_path, tmpdir, model_dir=model_dir)
 
             # 3) Parse MIDI -> NoteEvent list
+            _check_cancel(cancel)
             notes = _midi_to_notes(midi_path)
 
         warnings.append("Used basic_pitch successfully.")
         return notes, sr_out, warnings
 
+    except AnalysisCancelled:
+        raise
     except Exception as e:
         warnings.append(f"basic_pitch failed: {type(e).__name__}: {e}")
         warnings.append("Falling back to dummy notes.")
         return _dummy_notes(), sr_out, warnings
 
 
+def _check_cancel(cancel: Optional[threading.Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        raise AnalysisCancelled()
+
+
 # -----------------------------
 # Basic Pitch integration
 # -----------------------------
@@ -77,6 +106,20 @@ def _find_basic_pitch_tf_model_dir() -> Path:
     )
 
 
+def _basic_pitch_model(model_dir: Path):
+    """The loaded Basic Pitch model for model_dir, or the path itself on versions without Model."""
+    try:
+        from basic_pitch.inference import Model  # type: ignore
+    except ImportError:
+        return str(model_dir)
+    key = str(model_dir)
+    with _BASIC_PITCH_MODEL_LOCK:  # concurrent first calls must not each load it
+        model = _basic_pitch_models.get(key)
+        if model is None:
+            model = _basic_pitch_models[key] = Model(key)
+    return model
+
+
 def _run_basic_pitch(input_wav: Path, out_dir: Path, model_dir: Path) -> Path:
     """
     Runs basic_pitch.inference.predict_and_save and returns the produced .mid path.
@@ -91,7 +134,7 @@ def _run_basic_pitch(input_wav: Path, out_dir: Path, model_dir: Path) -> Path:
     # Required args in newer versions:
     kwargs = {
         "sonify_midi": False,
-        "model_or_model_path": str(model_dir),
+        "model_or_model_path": _basic_pitch_model(model_dir),
         "save_midi": True,
         "save_notes": False,
     }
@@ -100,7 +143,8 @@ def _run_basic_pitch(input_wav: Path, out_dir: Path, model_dir: Path) -> Path:
     if "save_model_outputs" in sig.parameters:
         kwargs["save_model_outputs"] = False
 
-    predict_and_save([str(input_wav)], str(out_dir), **kwargs)
+    with _BASIC_PITCH_SLOTS:
+        predict_and_save([str(input_wav)], str(out_dir), **kwargs)
 
     mids = sorted(out_dir.glob("*.mid"))
     if not mids:
@@ -113,14 +157,12 @@ def _run_basic_pitch(input_wav: Path, out_dir: Path, model_dir: Path) -> Path:
 # Audio decode helper (FFmpeg)
 # -----------------------------
 
-def _ffmpeg_exe() -> str:
-    bundled = config.FFMPEG_DIR / "ffmpeg.exe"
-    if bundled.exists():
-        return str(bundled)
-    return "ffmpeg"
-
-
-def _decode_to_wav(input_path: Path, out_dir: Path, warnings: Optional[List[str]] = None) -> Path:
+def _decode_to_wav(
+    input_path: Path,
+    out_dir: Path,
+    warnings: Optional[List[str]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Path:
     """
     Decode any supported audio file (mp3/wav/flac/m4a/...) to a WAV using FFmpeg.
     Returns path to the decoded WAV file.
@@ -133,6 +175,15 @@ def _decode_to_wav(input_path: Path, out_dir: Path, warnings: Optional[List[str]
     if not input_path.exists():
         raise FileNotFoundError(str(input_path))
 
+    # Already in the target format (e.g. pre-decoded when the file was opened): use as-is
+    if input_path.suffix.lower() == ".wav":
+        try:
+            info = sf.info(str(input_path))
+            if info.samplerate == 16000 and info.channels == 1:
+                return input_path
+        except Exception:
+            pass
+
     out_dir.mkdir(parents=True, exist_ok=True)
 
     ffmpeg = _ffmpeg_exe()
@@ -148,16 +199,26 @@ def _decode_to_wav(input_path: Path, out_dir: Path, warnings: Optional[List[str]
         str(wav_path),
     ]
 
-    result = subprocess.run(
+    proc = subprocess.Popen(
         cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True,
     )
+    # Poll so a cancel request kills FFmpeg instead of waiting out the decode
+    while True:
+        try:
+            _, stderr = proc.communicate(timeout=0.1)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel is not None and cancel.is_set():
+                proc.kill()
+                proc.communicate()
+                raise AnalysisCancelled()
 
-    if result.returncode != 0 or not wav_path.exists():
+    if proc.returncode != 0 or not wav_path.exists():
         # include stderr so we see the real decode failure
-        raise RuntimeError(f"FFmpeg decode failed:\n{result.stderr}")
+        raise RuntimeError(f"FFmpeg decode failed:\n{stderr}")
 
     return wav_path
 
@@ -173,60 +234,47 @@ def _midi_to_notes(midi_path: Path) -> List[NoteEvent]:
     """
     mid = mido.MidiFile(str(midi_path))
 
-    # Use MIDI tempo map to convert ticks -> seconds properly
-    # mido provides tick2second but needs tempo; if multiple tempo changes exist,
-    # we'd need a full tempo map integration. For Basic Pitch output, this is usually fine.
-    tempo = 500000  # default 120 BPM
+    # Walk all tracks as one time-ordered stream so tempo changes (usually in
+    # track 0) apply to notes in every other track.
     ticks_per_beat = mid.ticks_per_beat
+    sec_per_tick = 500000 / (ticks_per_beat * 1_000_000)  # default 120 BPM
 
     current_time_sec = 0.0
     active = {}  # (channel, pitch) -> (start_sec, velocity)
 
     notes: List[NoteEvent] = []
 
-    for track in mid.tracks:
-        current_time_sec = 0.0
-        active.clear()
-
-        for msg in track:
-            # Advance time
-            if msg.time:
-                current_time_sec += mido.tick2second(msg.time, ticks_per_beat, tempo)
-
-            if msg.type == "set_tempo":
-                tempo = msg.tempo
-                continue
-
-            if msg.type == "note_on" and msg.velocity > 0:
-                key = (getattr(msg, "channel", 0), msg.note)
-                active[key] = (current_time_sec, msg.velocity)
-
-            elif msg.type in ("note_off", "note_on"):
-                # note_on with velocity 0 is treated as note_off
-                if msg.type == "note_on" and msg.velocity != 0:
-                    continue
-
-                key = (getattr(msg, "channel", 0), msg.note)
-                if key in active:
-                    start_sec, vel = active.pop(key)
-                    end_sec = max(start_sec + 0.001, current_time_sec)
-                    notes.append(
-                        NoteEvent(
-                            start_sec=float(start_sec),
-                            end_sec=float(end_sec),
-                            midi_pitch=int(msg.note),
-                            velocity=int(vel),
-                            channel=int(key[0]),
-                        )
+    for msg in mido.merge_tracks(mid.tracks):
+        # Advance time
+        if msg.time:
+            current_time_sec += msg.time * sec_per_tick
+
+        if msg.type == "set_tempo":
+            sec_per_tick = msg.tempo / (ticks_per_beat * 1_000_000)
+            continue
+
+        if msg.type == "note_on" and msg.velocity > 0:
+            key = (msg.channel, msg.note)
+            active[key] = (current_time_sec, msg.velocity)
+
+        elif msg.type in ("note_off", "note_on"):
+            # note_on with velocity 0 is treated as note_off
+            key = (msg.channel, msg.note)
+            if key in active:
+                start_sec, vel = active.pop(key)
+                end_sec = max(start_sec + 0.001, current_time_sec)
+                notes.append(
+                    NoteEvent(
+                        start_sec=float(start_sec),
+                        end_sec=float(end_sec),
+                        midi_pitch=int(msg.note),
+                        velocity=int(vel),
+                        channel=int(key[0]),
                     )
-
-        # If you want multi-track merge, you'd collect across tracks.
-        # Basic Pitch usually writes notes in a single relevant track anyway.
-        if notes:
-            break
+                )
 
     # Sort notes by time
-    notes.sort(key=lambda n: (n.start_sec, n.midi_pitch))
+    notes.sort(key=attrgetter("start_sec", "midi_pitch"))
     return notes
 
 
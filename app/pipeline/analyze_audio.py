@@ -1,11 +1,15 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Callable, Optional
 
-from app.audio.io import decode_to_wav, load_wav_mono_float32
+import soundfile as sf
+
+from app.audio.io import load_audio_mono, load_wav_mono_float32
 from app.state import Settings, AnalysisSession
 from app.transcription.poly_model import PolyphonicStubTranscriber
 from app.transcription.postprocess import apply_tweaks
+from app.utils.cache import file_fingerprint
 
 
 ProgressFn = Optional[Callable[[int, str], None]]
@@ -23,16 +27,30 @@ def analyze_audio(
         if progress:
             progress(pct, msg)
 
-    emit(5, "Decoding audio…")
-    decoded_wav = cache_dir / f"{input_path.stem}_decoded.wav"
-    wav_path, w = decode_to_wav(input_path, decoded_wav, target_sr=16000)
-    warnings.extend(w)
+    # Model construction doesn't depend on the audio, so overlap it with the decode
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        transcriber_fut = ex.submit(PolyphonicStubTranscriber)
+
+        emit(5, "Decoding audio…")
+        target_sr = 16000
+        decoded_wav = cache_dir / f"{file_fingerprint(input_path)}_{target_sr}.wav"
+        if decoded_wav.exists():
+            audio, sr = load_wav_mono_float32(decoded_wav)
+        else:
+            audio, sr, w = load_audio_mono(input_path, target_sr=target_sr)
+            warnings.extend(w)
+            tmp = decoded_wav.with_suffix(".tmp")
+            try:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                sf.write(str(tmp), audio, sr, subtype="FLOAT", format="WAV")
+                tmp.replace(decoded_wav)  # atomic, so a failed write never leaves a partial cache hit
+            except Exception:
+                tmp.unlink(missing_ok=True)
+                decoded_wav = input_path
 
-    emit(25, "Loading decoded audio…")
-    audio, sr = load_wav_mono_float32(wav_path)
+        transcriber = transcriber_fut.result()
 
     emit(55, "Transcribing (stub)…")
-    transcriber = PolyphonicStubTranscriber()
     raw_notes = transcriber.transcribe(audio, sr, settings)
 
     emit(75, "Applying tweaks…")
@@ -41,7 +59,7 @@ def analyze_audio(
     emit(100, "Analysis complete.")
     return AnalysisSession(
         input_path=input_path,
-        decoded_wav_path=wav_path,
+        decoded_wav_path=decoded_wav,
         sample_rate=sr,
         raw_notes=raw_notes,
         current_notes=current_notes,
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+import pickle
+import threading
+
+from app.midi.model import NoteEvent
+from app.pipeline.analyze import analyze_audio
+from app.utils.cache import file_fingerprint
+
+# Bump when analyze_audio's output for the same input changes, so stale entries are ignored.
+ANALYZE_CACHE_VERSION = 1
+
+
+def cached_analyze(
+    input_path: Path, cache_dir: Path, cancel: Optional[threading.Event] = None
+) -> Tuple[List[NoteEvent], int, List[str]]:
+    """
+    analyze_audio() with results stored in cache_dir, keyed by the file's content fingerprint.
+    Re-transcribing an unchanged file becomes a small pickle read.
+    Fallback (dummy-note) results are never cached. cancel is passed to analyze_audio.
+    """
+    input_path = Path(input_path)
+    key = cache_dir / f"analyze_{file_fingerprint(input_path)}_v{ANALYZE_CACHE_VERSION}.pkl"
+
+    try:
+        return pickle.loads(key.read_bytes())
+    except Exception:
+        pass
+
+    notes, sr, warnings = analyze_audio(input_path, cancel=cancel)
+
+    if not any(w.startswith("basic_pitch failed") for w in warnings):
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = key.with_suffix(".tmp")
+            tmp.write_bytes(pickle.dumps((notes, sr, warnings), protocol=pickle.HIGHEST_PROTOCOL))
+            tmp.replace(key)  # atomic, so concurrent stem workers never read a partial file
+        except OSError:
+            pass
+
+    return notes, sr, warnings
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+import io
+import os
+import re
+import sys
+import threading
+
+
+_PERCENT_RE = re.compile(r"(\d{1,3})%\|")
+
+
+class SeparationCancelled(Exception):
+    pass
+
+
+class _StreamTap(io.TextIOBase):
+    """
+    Pass-through text stream for Demucs' stdout/stderr.
+
+    Reports tqdm-style 'NN%|' progress and complete text lines as they are written,
+    and raises SeparationCancelled on the next write once cancellation is requested
+    (Demucs runs in-process, so this is the only point we can interrupt it).
+
+    sys.stdout/sys.stderr are process-wide, so only writes from the thread that
+    installed the tap are inspected; other workers' output passes straight through.
+    That includes anything Demucs' own -j worker threads print: it still reaches the
+    real stream but isn't reported as progress or lines.
+    """
+
+    def __init__(self, stream, on_percent=None, on_line=None, cancelled=None) -> None:
+        super().__init__()
+        self._stream = stream
+        self._on_percent = on_percent
+        self._on_line = on_line
+        self._cancelled = cancelled
+        self._pending = ""
+        self._owner = threading.get_ident()
+
+    def write(self, s: str) -> int:
+        if threading.get_ident() != self._owner:
+            return self._stream.write(s)
+        if self._cancelled is not None and self._cancelled():
+            raise SeparationCancelled()
+        if self._on_percent is not None:
+            hits = _PERCENT_RE.findall(s)
+            if hits:
+                self._on_percent(int(hits[-1]))
+        if self._on_line is not None and "\n" in s:
+            *lines, self._pending = (self._pending + s).split("\n")
+            for line in lines:
+                line = line.strip()
+                # '\r'-redrawn progress bars are reported through on_percent instead
+                if line and not _PERCENT_RE.search(line):
+                    self._on_line(line)
+        elif self._on_line is not None:
+            self._pending += s
+        return self._stream.write(s)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+
+# Most recently used Demucs model as ((name, repo), model), so repeat separations
+# skip the multi-second load. Only one is kept: htdemucs_6s alone is hundreds of MB.
+_demucs_model: Optional[tuple] = None
+
+
+@contextmanager
+def _cached_demucs_loader():
+    """
+    Route demucs.separate's model loader through _demucs_model for one run, and put
+    the original back afterwards so the patch is never visible outside our run.
+
+    get_model_from_args is a Demucs internal (present in 4.x); when a version lacks
+    it, or it isn't callable, Demucs runs unpatched and loads the model itself.
+    """
+    try:
+        import demucs.separate as sep  # type: ignore
+    except Exception:
+        sep = None
+    load = getattr(sep, "get_model_from_args", None)
+    if not callable(load):
+        yield
+        return
+
+    def cached_load(args):
+        global _demucs_model
+        name = getattr(args, "name", None)
+        if name is None:
+            return load(args)
+        key = (name, str(getattr(args, "repo", None) or ""))
+        if _demucs_model is None or _demucs_model[0] != key:
+            _demucs_model = None  # release the previous model before loading the next
+            _demucs_model = (key, load(args))
+        return _demucs_model[1]
+
+    sep.get_model_from_args = cached_load
+    try:
+        yield
+    finally:
+        sep.get_model_from_args = load
+
+
+def run_demucs_inprocess(
+    args: List[str],
+    on_percent: Optional[Callable[[int], None]] = None,
+    on_line: Optional[Callable[[str], None]] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> None:
+    """
+    Run demucs separation *in-process* with the Demucs CLI args.
+
+    IMPORTANT: In PyInstaller builds, sys.executable points to WaveNotes.exe, so using
+    subprocess([sys.executable, "-m", "demucs", ...]) will relaunch the app.
+
+    on_percent/on_line receive progress and status lines while the run goes; once
+    cancelled() returns True the run stops with SeparationCancelled.
+    """
+    demucs_main = None
+    last_err = None
+    for modpath in ("demucs.separate", "demucs.__main__"):
+        try:
+            mod = __import__(modpath, fromlist=["main"])
+            demucs_main = getattr(mod, "main")
+            break
+        except Exception as e:
+            last_err = e
+
+    if demucs_main is None:
+        raise RuntimeError(f"Could not import Demucs entrypoint. Last error: {last_err}")
+    # PyInstaller --windowed can set stdout/stderr to None.
+    # Demucs writes logs/progress to them, so ensure they exist.
+    if sys.stdout is None:
+        sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    if sys.stderr is None:
+        sys.stderr = open(os.devnull, "w", encoding="utf-8")
+
+    # Demucs prints status lines on stdout and tqdm progress on stderr;
+    # tap both so they reach the UI while the run is still going.
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    stdout_tap = _StreamTap(real_stdout, on_line=on_line, cancelled=cancelled)
+    stderr_tap = _StreamTap(real_stderr, on_percent=on_percent, on_line=on_line, cancelled=cancelled)
+    sys.stdout, sys.stderr = stdout_tap, stderr_tap
+
+    # demucs CLI often uses SystemExit to exit; treat nonzero as failure
+    try:
+        with _cached_demucs_loader():
+            demucs_main(args)
+    except SystemExit as e:
+        code = getattr(e, "code", 0)
+        if code not in (0, None):
+            raise RuntimeError(f"Demucs exited with code {code}") from e
+    finally:
+        # Only undo our own swap: a stream someone else installed meanwhile stays
+        if sys.stdout is stdout_tap:
+            sys.stdout = real_stdout
+        if sys.stderr is stderr_tap:
+            sys.stderr = real_stderr
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
+import numpy as np
 
-@dataclass
+
+@dataclass(frozen=True)
 class Settings:
     min_note_ms: int = 80
     min_velocity: int = 10
@@ -20,12 +22,35 @@ class Settings:
     quantize_strength: int = 60
 
 
-@dataclass
+@dataclass(slots=True)
 class NoteEvent:
     start_sec: float
     end_sec: float
     midi_pitch: int
     velocity: int = 96
+    channel: int = 0  # 0-15
+
+
+NoteArrays = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def notes_to_arrays(notes: List[NoteEvent]) -> NoteArrays:
+    """
+    Split a NoteEvent list into parallel (starts, ends, pitches, velocities) arrays.
+    """
+    count = len(notes)
+    starts = np.fromiter((n.start_sec for n in notes), dtype=np.float64, count=count)
+    ends = np.fromiter((n.end_sec for n in notes), dtype=np.float64, count=count)
+    pitches = np.fromiter((n.midi_pitch for n in notes), dtype=np.int32, count=count)
+    vels = np.fromiter((n.velocity for n in notes), dtype=np.int32, count=count)
+    return starts, ends, pitches, vels
+
+
+def arrays_to_notes(starts: np.ndarray, ends: np.ndarray, pitches: np.ndarray, vels: np.ndarray) -> List[NoteEvent]:
+    return [
+        NoteEvent(st, en, p, v)
+        for st, en, p, v in zip(starts.tolist(), ends.tolist(), pitches.tolist(), vels.tolist())
+    ]
 
 
 @dataclass
@@ -36,3 +61,21 @@ class AnalysisSession:
     raw_notes: List[NoteEvent] = field(default_factory=list)
     current_notes: List[NoteEvent] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
+    # raw_notes as (starts, ends, pitches, velocities) NumPy arrays, built once
+    # per analysis (see notes_to_arrays)
+    raw_arrays: Optional[NoteArrays] = None
+
+
+@dataclass(slots=True, frozen=True)
+class SeparationRequest:
+    input_paths: tuple[str, ...]
+    output_dir: str
+    model: str = "htdemucs_6s"
+    device: str = "auto"
+    output_format: str = "mp3"
+    mp3_bitrate: int = 320
+    segment: int = 0
+    shifts: int = 0
+    overwrite: bool = False
+    flat_naming: bool = True
+    use_subfolder: bool = False
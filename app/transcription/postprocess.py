@@ -1,7 +1,75 @@
 from __future__ import annotations
 
-from typing import List
-from app.state import Settings, NoteEvent
+from functools import lru_cache
+from typing import List, Tuple
+import heapq
+
+import numpy as np
+
+from app.state import Settings, NoteEvent, NoteArrays, notes_to_arrays, arrays_to_notes
+
+
+@lru_cache(maxsize=None)
+def _jit(fn):
+    """
+    numba-compiled fn, compiled here on the sample inputs from _KERNEL_SAMPLES so
+    any numba failure surfaces now rather than mid-tweak. Returns None when numba
+    isn't installed (it's optional) or can't build the kernel.
+    """
+    try:
+        from numba import njit
+    except Exception:
+        return None
+    try:
+        try:
+            compiled = njit(cache=True)(fn)
+        except Exception:
+            # Frozen (PyInstaller) builds ship no source files, so numba's on-disk
+            # cache has no locator; compile without it
+            compiled = njit(fn)
+        compiled(*_KERNEL_SAMPLES[fn]())
+    except Exception:
+        return None
+    return compiled
+
+
+_warmed: set = set()  # kernels warm_up_kernels() has been through
+
+
+def _kernel(fn):
+    """fn's compiled kernel if warm_up_kernels() has built it, else None (use the Python path)."""
+    return _jit(fn) if fn in _warmed else None
+
+
+def warm_up_kernels() -> None:
+    """
+    Compile the numba kernels (or load them from numba's cache). Slow the first time,
+    so call it off the UI thread; until it has run, tweaks use the Python paths.
+    """
+    for fn in _KERNEL_SAMPLES:
+        _jit(fn)
+        _warmed.add(fn)
+
+
+def _sort_by_start_pitch(starts: np.ndarray, ends: np.ndarray, pitches: np.ndarray, vels: np.ndarray) -> NoteArrays:
+    order = np.lexsort((pitches, starts))
+    return starts[order], ends[order], pitches[order], vels[order]
+
+
+def _dedup_arrays(starts: np.ndarray, ends: np.ndarray, pitches: np.ndarray, vels: np.ndarray) -> NoteArrays:
+    """
+    Drop notes with identical (pitch, start, end), keeping the loudest copy.
+    Survivors keep their original relative order.
+    """
+    if starts.size < 2:
+        return starts, ends, pitches, vels
+    order = np.lexsort((-vels, ends, starts, pitches))
+    p, st, en = pitches[order], starts[order], ends[order]
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = (p[1:] != p[:-1]) | (st[1:] != st[:-1]) | (en[1:] != en[:-1])
+    keep = np.zeros(order.size, dtype=bool)
+    keep[order[first]] = True
+    return starts[keep], ends[keep], pitches[keep], vels[keep]
 
 
 def _grid_seconds(bpm: int, grid_str: str) -> float:
@@ -22,104 +90,191 @@ def _quantize_time(t: float, grid: float, strength: float) -> float:
     return t + (target - t) * strength
 
 
-def _apply_quantize(notes: List[NoteEvent], s: Settings) -> List[NoteEvent]:
+def _quantize_arrays(starts: np.ndarray, ends: np.ndarray, s: Settings) -> Tuple[np.ndarray, np.ndarray]:
     grid = _grid_seconds(s.quantize_bpm, s.quantize_grid)
     strength = max(0.0, min(1.0, s.quantize_strength / 100.0))
-    if strength <= 0.0:
-        return notes
+    if strength <= 0.0 or grid <= 0:
+        return starts, ends
 
     min_dur = max(0.001, s.min_note_ms / 1000.0)
-    out: List[NoteEvent] = []
-    for n in notes:
-        st_q = _quantize_time(n.start_sec, grid, strength)
-        en_q = _quantize_time(n.end_sec, grid, strength)
-        if en_q < st_q:
-            st_q, en_q = en_q, st_q
-        if en_q - st_q < min_dur:
-            en_q = st_q + min_dur
-        out.append(NoteEvent(st_q, en_q, int(n.midi_pitch), int(n.velocity)))
-    return out
+    st_q = starts + (np.round(starts / grid) * grid - starts) * strength
+    en_q = ends + (np.round(ends / grid) * grid - ends) * strength
+    lo = np.minimum(st_q, en_q)
+    hi = np.maximum(st_q, en_q)
+    hi = np.maximum(hi, lo + min_dur)
+    return lo, hi
 
 
-def _merge_gap(notes: List[NoteEvent], gap_sec: float) -> List[NoteEvent]:
-    if gap_sec <= 0:
-        return sorted(notes, key=lambda n: (n.start_sec, n.midi_pitch))
+def _apply_quantize(notes: List[NoteEvent], s: Settings) -> List[NoteEvent]:
+    starts, ends, pitches, vels = notes_to_arrays(notes)
+    starts, ends = _quantize_arrays(starts, ends, s)
+    return arrays_to_notes(starts, ends, pitches, vels)
 
-    notes = sorted(notes, key=lambda n: (n.midi_pitch, n.start_sec, n.end_sec))
-    out: List[NoteEvent] = []
+
+def _merge_gap_kernel(starts, ends, pitches, vels, gap_sec):
+    # Inputs must be sorted by (pitch, start, end).
+    count = starts.shape[0]
+    out_st = np.empty(count, dtype=np.float64)
+    out_en = np.empty(count, dtype=np.float64)
+    out_p = np.empty(count, dtype=np.int32)
+    out_v = np.empty(count, dtype=np.int32)
+    k = 0
     i = 0
-    while i < len(notes):
-        cur = notes[i]
-        st = cur.start_sec
-        en = cur.end_sec
-        vel = cur.velocity
-        p = cur.midi_pitch
+    while i < count:
+        st = starts[i]
+        en = ends[i]
+        vel = vels[i]
+        p = pitches[i]
         j = i + 1
-        while j < len(notes) and notes[j].midi_pitch == p:
-            nxt = notes[j]
-            if nxt.start_sec <= en + gap_sec:
-                en = max(en, nxt.end_sec)
-                vel = max(vel, nxt.velocity)
-                j += 1
-            else:
-                break
-        out.append(NoteEvent(st, en, p, vel))
+        while j < count and pitches[j] == p and starts[j] <= en + gap_sec:
+            if ends[j] > en:
+                en = ends[j]
+            if vels[j] > vel:
+                vel = vels[j]
+            j += 1
+        out_st[k] = st
+        out_en[k] = en
+        out_p[k] = p
+        out_v[k] = vel
+        k += 1
         i = j
-    return sorted(out, key=lambda n: (n.start_sec, n.midi_pitch))
+    return out_st[:k], out_en[:k], out_p[:k], out_v[:k]
 
 
-def _cap_polyphony(notes: List[NoteEvent], max_polyphony: int) -> List[NoteEvent]:
+def _merge_gap_arrays(starts: np.ndarray, ends: np.ndarray, pitches: np.ndarray, vels: np.ndarray, gap_sec: float) -> NoteArrays:
+    if gap_sec <= 0 or starts.size == 0:
+        return _sort_by_start_pitch(starts, ends, pitches, vels)
+
+    order = np.lexsort((ends, starts, pitches))
+    kernel = _kernel(_merge_gap_kernel) or _merge_gap_kernel
+    merged = kernel(
+        starts[order], ends[order],
+        pitches[order].astype(np.int32), vels[order].astype(np.int32),
+        float(gap_sec),
+    )
+    return _sort_by_start_pitch(*merged)
+
+
+def _merge_gap(notes: List[NoteEvent], gap_sec: float) -> List[NoteEvent]:
+    return arrays_to_notes(*_merge_gap_arrays(*notes_to_arrays(notes), gap_sec))
+
+
+def _cap_polyphony_kernel(starts, ends, vels, max_polyphony):
+    # Inputs must be sorted by (start, -velocity). Returns a keep-mask in that order.
+    count = starts.shape[0]
+    keep = np.ones(count, dtype=np.bool_)
+    active = np.empty(max_polyphony + 1, dtype=np.int64)
+    n_active = 0
+    for i in range(count):
+        t = starts[i]
+        # Prune notes that ended, preserving insertion order
+        w = 0
+        for a in range(n_active):
+            if ends[active[a]] > t:
+                active[w] = active[a]
+                w += 1
+        n_active = w
+
+        active[n_active] = i
+        n_active += 1
+        if n_active > max_polyphony:
+            worst = 0
+            for a in range(1, n_active):
+                if vels[active[a]] < vels[active[worst]]:
+                    worst = a
+            keep[active[worst]] = False
+            for a in range(worst, n_active - 1):
+                active[a] = active[a + 1]
+            n_active -= 1
+    return keep
+
+
+def _cap_polyphony_heap(starts: np.ndarray, ends: np.ndarray, vels: np.ndarray, max_polyphony: int) -> np.ndarray:
+    """
+    Pure-Python equivalent of _cap_polyphony_kernel for when numba is unavailable.
+    Uses an end-time heap for pruning and a (velocity, seq) heap for eviction, with
+    lazy deletion, so each note costs O(log P) instead of a scan over the active set.
+    """
+    keep = np.ones(starts.shape[0], dtype=bool)
+    by_end: List[Tuple[float, int]] = []
+    by_vel: List[Tuple[int, int]] = []
+    gone = set()  # seqs that expired or were evicted
+    n_active = 0
+
+    for seq, (t, en, vel) in enumerate(zip(starts.tolist(), ends.tolist(), vels.tolist())):
+        while by_end and by_end[0][0] <= t:
+            _, old = heapq.heappop(by_end)
+            if old not in gone:
+                gone.add(old)
+                n_active -= 1
+
+        heapq.heappush(by_end, (en, seq))
+        heapq.heappush(by_vel, (vel, seq))
+        n_active += 1
+
+        if n_active > max_polyphony:
+            while True:
+                _, worst = heapq.heappop(by_vel)
+                if worst not in gone:
+                    break
+            gone.add(worst)
+            keep[worst] = False
+            n_active -= 1
+    return keep
+
+
+def _cap_polyphony_arrays(starts: np.ndarray, ends: np.ndarray, pitches: np.ndarray, vels: np.ndarray, max_polyphony: int) -> NoteArrays:
     max_polyphony = int(max_polyphony)
-    if max_polyphony <= 0:
-        return sorted(notes, key=lambda n: (n.start_sec, n.midi_pitch))
+    if max_polyphony <= 0 or starts.size == 0:
+        return _sort_by_start_pitch(starts, ends, pitches, vels)
 
-    notes = sorted(notes, key=lambda n: (n.start_sec, -n.velocity))
-    active: List[NoteEvent] = []
-    kept: List[NoteEvent] = []
+    order = np.lexsort((-vels, starts))
+    starts, ends, pitches, vels = starts[order], ends[order], pitches[order], vels[order]
+    kernel = _kernel(_cap_polyphony_kernel)
+    if kernel is not None:
+        keep = kernel(starts, ends, vels.astype(np.int32), max_polyphony)
+    else:
+        keep = _cap_polyphony_heap(starts, ends, vels, max_polyphony)
+    return _sort_by_start_pitch(starts[keep], ends[keep], pitches[keep], vels[keep])
 
-    def prune(t: float) -> None:
-        nonlocal active
-        active = [a for a in active if a.end_sec > t]
 
-    for n in notes:
-        prune(n.start_sec)
-        kept.append(n)
-        active.append(n)
-        if len(active) > max_polyphony:
-            worst = min(active, key=lambda x: x.velocity)
-            try:
-                kept.remove(worst)
-            except ValueError:
-                pass
-            active.remove(worst)
+# One tiny input per kernel, in the dtypes the callers pass, for compiling up front
+_KERNEL_SAMPLES = {
+    _merge_gap_kernel: lambda: (
+        np.zeros(1), np.ones(1), np.zeros(1, dtype=np.int32), np.zeros(1, dtype=np.int32), 0.0,
+    ),
+    _cap_polyphony_kernel: lambda: (np.zeros(1), np.ones(1), np.zeros(1, dtype=np.int32), 1),
+}
 
-    return sorted(kept, key=lambda n: (n.start_sec, n.midi_pitch))
+
+def _cap_polyphony(notes: List[NoteEvent], max_polyphony: int) -> List[NoteEvent]:
+    return arrays_to_notes(*_cap_polyphony_arrays(*notes_to_arrays(notes), max_polyphony))
 
 
 def apply_tweaks(raw_notes: List[NoteEvent], s: Settings) -> List[NoteEvent]:
+    return arrays_to_notes(*apply_tweaks_arrays(notes_to_arrays(raw_notes), s))
+
+
+def apply_tweaks_arrays(raw: NoteArrays, s: Settings) -> NoteArrays:
+    """
+    apply_tweaks on (starts, ends, pitches, vels) arrays; returns new arrays sorted
+    by start then pitch. The input arrays are not modified.
+    """
     min_dur = max(0.0, s.min_note_ms / 1000.0)
     pmin = int(s.pitch_min)
     pmax = int(s.pitch_max)
     min_vel = int(s.min_velocity)
 
-    out: List[NoteEvent] = []
-    for n in raw_notes:
-        if n.midi_pitch < pmin or n.midi_pitch > pmax:
-            continue
-        if n.end_sec <= n.start_sec:
-            continue
-        if (n.end_sec - n.start_sec) < min_dur:
-            continue
-        if int(n.velocity) < min_vel:
-            continue
-        out.append(NoteEvent(float(n.start_sec), float(n.end_sec), int(n.midi_pitch), int(n.velocity)))
-
-    out = _merge_gap(out, s.merge_gap_ms / 1000.0)
-    out = _cap_polyphony(out, s.max_polyphony)
+    starts, ends, pitches, vels = raw
+    dur = ends - starts
+    mask = (pitches >= pmin) & (pitches <= pmax) & (dur > 0) & (dur >= min_dur) & (vels >= min_vel)
+    starts, ends, pitches, vels = _dedup_arrays(starts[mask], ends[mask], pitches[mask], vels[mask])
+
+    starts, ends, pitches, vels = _merge_gap_arrays(starts, ends, pitches, vels, s.merge_gap_ms / 1000.0)
+    starts, ends, pitches, vels = _cap_polyphony_arrays(starts, ends, pitches, vels, s.max_polyphony)
 
     if s.quantize:
-        out = _apply_quantize(out, s)
+        starts, ends = _quantize_arrays(starts, ends, s)
 
-    v = max(1, min(127, int(s.velocity)))
-    out = [NoteEvent(n.start_sec, n.end_sec, n.midi_pitch, v) for n in out]
-    return sorted(out, key=lambda n: (n.start_sec, n.midi_pitch))
+    vels[:] = max(1, min(127, int(s.velocity)))
+    return _sort_by_start_pitch(starts, ends, pitches, vels)
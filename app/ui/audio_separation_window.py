@@ -4,167 +4,241 @@
 
 from __future__ import annotations
 
-from typing import Optional, Dict, Any
-from PySide6.QtWidgets import QProgressBar
+from typing import Optional
 
-
-from PySide6.QtCore import Signal
+from PySide6.QtCore import QStringListModel, Signal, Slot
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
-    QFileDialog, QFormLayout, QComboBox, QSpinBox, QGroupBox, QWidget
+    QFileDialog, QFormLayout, QComboBox, QSpinBox, QGroupBox,
+    QProgressBar,
 )
 
+from app.state import SeparationRequest
+
+# Suffixes offered by the input file picker
+_AUDIO_EXTS = (".mp3", ".wav", ".flac", ".m4a", ".ogg", ".aac")
+
 
 class AudioSeparationWindow(QDialog):
     # MainWindow typically connects to this signal
-    separationRequested = Signal(dict)
+    # Emits a SeparationRequest (passed by reference, no QVariant dict marshalling)
+    separationRequested = Signal(object)
+    cancelRequested = Signal()
+
+    # Fixed choices, shared by every dialog instance (built on first construction)
+    _FORMAT_MODEL: Optional[QStringListModel] = None
+    _BITRATE_MODEL: Optional[QStringListModel] = None
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Audio Separation")
         self.setModal(False)
+        # Coalesce the relayouts from building ~20 widgets into one pass at the end
+        self.setUpdatesEnabled(False)
+        try:
+            self._input_paths: list[str] = []
+            # File dialogs are kept across clicks so their filesystem model stays warm
+            self._input_dlg: Optional[QFileDialog] = None
+            self._out_dlg: Optional[QFileDialog] = None
+
+            root = QVBoxLayout(self)
+
+            # --- (Compatibility) Keep lbl_model attribute even if we don't show it ---
+            self.lbl_model = QLabel("htdemucs_6s")
+            self.lbl_model.setToolTip("Demucs model used for separation (fixed).")
+            self.lbl_model.hide()
+
+            # --- Input/Output selectors ---
+            io_box = QGroupBox("Files")
+            io_layout = QFormLayout(io_box)
+
+            self.txt_input = QLineEdit()
+            self.txt_input.setReadOnly(True)
+
+            btn_pick_input = QPushButton("Choose audio…")
+            btn_pick_input.clicked.connect(self._pick_input)
+
+            in_row = QHBoxLayout()
+            in_row.setContentsMargins(0, 0, 0, 0)
+            in_row.addWidget(self.txt_input, 1)
+            in_row.addWidget(btn_pick_input)
+
+            self.txt_output_dir = QLineEdit()
+            self.txt_output_dir.setReadOnly(True)
+
+            btn_pick_output = QPushButton("Choose output folder…")
+            btn_pick_output.clicked.connect(self._pick_output_dir)
+
+            out_row = QHBoxLayout()
+            out_row.setContentsMargins(0, 0, 0, 0)
+            out_row.addWidget(self.txt_output_dir, 1)
+            out_row.addWidget(btn_pick_output)
+
+            io_layout.addRow("Input audio:", in_row)
+            io_layout.addRow("Output folder:", out_row)
+
+            root.addWidget(io_box)
+
+            # --- Settings (MP3 only; device removed) ---
+            s_box = QGroupBox("Settings")
+            s_form = QFormLayout(s_box)
+
+            cls = type(self)
+            if cls._FORMAT_MODEL is None:
+                cls._FORMAT_MODEL = QStringListModel(["mp3"])
+                cls._BITRATE_MODEL = QStringListModel(["128", "192", "256", "320"])
+
+            self.cmb_format = QComboBox()
+            self.cmb_format.blockSignals(True)
+            self.cmb_format.setModel(cls._FORMAT_MODEL)
+            self.cmb_format.setCurrentIndex(0)  # mp3
+            self.cmb_format.blockSignals(False)
+            s_form.addRow("Output format:", self.cmb_format)
+
+            self.cmb_bitrate = QComboBox()
+            self.cmb_bitrate.blockSignals(True)
+            self.cmb_bitrate.setModel(cls._BITRATE_MODEL)
+            self.cmb_bitrate.setCurrentIndex(3)  # 320
+            self.cmb_bitrate.blockSignals(False)
+            s_form.addRow("MP3 bitrate:", self.cmb_bitrate)
+
+            self.spin_shifts = QSpinBox()
+            self.spin_shifts.setRange(0, 10)
+            self.spin_shifts.setValue(0)
+            self.spin_shifts.setToolTip("Increase for slightly better quality at the cost of time.")
+            s_form.addRow("Shifts:", self.spin_shifts)
+
+            self.spin_segment = QSpinBox()
+            self.spin_segment.setRange(0, 60)
+            self.spin_segment.setValue(0)
+            self.spin_segment.setToolTip("0 = default. Higher can reduce memory use; may affect speed/quality.")
+            s_form.addRow("Segment (s):", self.spin_segment)
+
+            root.addWidget(s_box)
+
+            # Determinate bar driven by set_progress(); a busy marquee would repaint
+            # continuously for the whole (minutes-long) separation.
+            self.progress = QProgressBar()
+            self.progress.setRange(0, 100)
+            self.progress.setTextVisible(False)
+            self.progress.setVisible(False)
+            root.addWidget(self.progress)
+
+            self.lbl_status = QLabel("")
+            self.lbl_status.setVisible(False)
+            root.addWidget(self.lbl_status)
+
+            # --- Buttons ---
+            btn_row = QHBoxLayout()
+            btn_row.addStretch(1)
+
+            self.btn_separate = QPushButton("Separate")
+            self.btn_separate.clicked.connect(self._on_separate_clicked)
+
+            self.btn_cancel = QPushButton("Cancel")
+            self.btn_cancel.setVisible(False)
+            self.btn_cancel.clicked.connect(self._on_cancel_clicked)
 
-        self._input_path: Optional[str] = None
-
-        root = QVBoxLayout(self)
-
-        # --- (Compatibility) Keep lbl_model attribute even if we don't show it ---
-        self.lbl_model = QLabel("htdemucs_6s")
-        self.lbl_model.setToolTip("Demucs model used for separation (fixed).")
-        self.lbl_model.hide()
-
-        # --- Input/Output selectors ---
-        io_box = QGroupBox("Files")
-        io_layout = QFormLayout(io_box)
-
-        self.txt_input = QLineEdit()
-        self.txt_input.setReadOnly(True)
-
-        btn_pick_input = QPushButton("Choose audio…")
-        btn_pick_input.clicked.connect(self._pick_input)
-
-        in_row = QWidget()
-        in_row_l = QHBoxLayout(in_row)
-        in_row_l.setContentsMargins(0, 0, 0, 0)
-        in_row_l.addWidget(self.txt_input, 1)
-        in_row_l.addWidget(btn_pick_input)
-
-        self.txt_output_dir = QLineEdit()
-        self.txt_output_dir.setReadOnly(True)
-
-        btn_pick_output = QPushButton("Choose output folder…")
-        btn_pick_output.clicked.connect(self._pick_output_dir)
-
-        out_row = QWidget()
-        out_row_l = QHBoxLayout(out_row)
-        out_row_l.setContentsMargins(0, 0, 0, 0)
-        out_row_l.addWidget(self.txt_output_dir, 1)
-        out_row_l.addWidget(btn_pick_output)
-
-        io_layout.addRow("Input audio:", in_row)
-        io_layout.addRow("Output folder:", out_row)
-
-        root.addWidget(io_box)
-
-        # --- Settings (MP3 only; device removed) ---
-        s_box = QGroupBox("Settings")
-        s_form = QFormLayout(s_box)
-
-        self.cmb_format = QComboBox()
-        self.cmb_format.addItems(["mp3"])
-        self.cmb_format.setCurrentText("mp3")
-        s_form.addRow("Output format:", self.cmb_format)
-
-        self.cmb_bitrate = QComboBox()
-        self.cmb_bitrate.addItems(["128", "192", "256", "320"])
-        self.cmb_bitrate.setCurrentText("320")
-        s_form.addRow("MP3 bitrate:", self.cmb_bitrate)
+            self.btn_close = QPushButton("Close")
+            self.btn_close.clicked.connect(self.close)
+
+            btn_row.addWidget(self.btn_separate)
+            btn_row.addWidget(self.btn_cancel)
+            btn_row.addWidget(self.btn_close)
+
+            root.addLayout(btn_row)
 
-        self.spin_shifts = QSpinBox()
-        self.spin_shifts.setRange(0, 10)
-        self.spin_shifts.setValue(0)
-        self.spin_shifts.setToolTip("Increase for slightly better quality at the cost of time.")
-        s_form.addRow("Shifts:", self.spin_shifts)
-
-        self.spin_segment = QSpinBox()
-        self.spin_segment.setRange(0, 60)
-        self.spin_segment.setValue(0)
-        self.spin_segment.setToolTip("0 = default. Higher can reduce memory use; may affect speed/quality.")
-        s_form.addRow("Segment (s):", self.spin_segment)
-
-        root.addWidget(s_box)
-
-        self.progress = QProgressBar()
-        self.progress.setRange(0, 0)   # indeterminate / busy
-        self.progress.setVisible(False)
-        root.addWidget(self.progress)
-
-        self.lbl_status = QLabel("")
-        self.lbl_status.setVisible(False)
-        root.addWidget(self.lbl_status)
-
-        # --- Buttons ---
-        btn_row = QHBoxLayout()
-        btn_row.addStretch(1)
-
-        self.btn_separate = QPushButton("Separate")
-        self.btn_separate.clicked.connect(self._on_separate_clicked)
-
-        self.btn_close = QPushButton("Close")
-        self.btn_close.clicked.connect(self.close)
-
-        btn_row.addWidget(self.btn_separate)
-        btn_row.addWidget(self.btn_close)
-
-        root.addLayout(btn_row)
-
-        self.resize(640, 260)
+            self.resize(640, 260)
+            root.activate()
+        finally:
+            self.setUpdatesEnabled(True)
 
     # ---- Public API (used by MainWindow in some versions) ----
+    @Slot(str)
     def set_input_path(self, path: str):
-        self._input_path = path
-        self.txt_input.setText(path)
+        self.set_input_paths([path])
+
+    @Slot(list)
+    def set_input_paths(self, paths: list):
+        self._input_paths = list(paths)
+        if len(self._input_paths) == 1:
+            self.txt_input.setText(self._input_paths[0])
+        else:
+            self.txt_input.setText(f"{len(self._input_paths)} files: " + "; ".join(self._input_paths))
 
+    @Slot(str)
     def _refresh_stems_from_folder(self, folder: str = ""):
         # Compatibility no-op: MainWindow may call this after separation.
         return
 
     # ---- Internal helpers ----
+    @Slot()
     def _pick_input(self):
-        path, _ = QFileDialog.getOpenFileName(
-            self, "Choose audio file", "", "Audio Files (*.mp3 *.wav *.flac *.m4a *.ogg *.aac);;All Files (*)"
-        )
-        if path:
-            self.set_input_path(path)
-
+        if self._input_dlg is None:
+            dlg = QFileDialog(
+                self, "Choose audio file(s)", "",
+                f"Audio Files ({' '.join('*' + ext for ext in _AUDIO_EXTS)});;All Files (*)",
+            )
+            # Skip custom icon/symlink probes: they stat every entry and can stall on network drives
+            dlg.setOption(QFileDialog.DontUseCustomDirectoryIcons, True)
+            dlg.setOption(QFileDialog.DontResolveSymlinks, True)
+            dlg.setFileMode(QFileDialog.ExistingFiles)
+            self._input_dlg = dlg
+        if self._input_dlg.exec() and self._input_dlg.selectedFiles():
+            self.set_input_paths(self._input_dlg.selectedFiles())
+
+    @Slot()
     def _pick_output_dir(self):
-        folder = QFileDialog.getExistingDirectory(self, "Choose output folder")
-        if folder:
-            self.txt_output_dir.setText(folder)
-
+        if self._out_dlg is None:
+            dlg = QFileDialog(self, "Choose output folder", "")
+            dlg.setFileMode(QFileDialog.Directory)
+            dlg.setOption(QFileDialog.ShowDirsOnly, True)
+            dlg.setOption(QFileDialog.DontUseCustomDirectoryIcons, True)
+            dlg.setOption(QFileDialog.DontResolveSymlinks, True)
+            self._out_dlg = dlg
+        if self._out_dlg.exec() and self._out_dlg.selectedFiles():
+            self.txt_output_dir.setText(self._out_dlg.selectedFiles()[0])
+
+    @Slot()
     def _on_separate_clicked(self):
-        in_path = (self._input_path or "").strip()
-        out_dir = self.txt_output_dir.text().strip()
+        # Both paths come from file dialogs (the fields are read-only), so no strip() needed
+        in_paths = self._input_paths
+        out_dir = self.txt_output_dir.text()
 
-        if not in_path or not out_dir:
+        if not in_paths or not out_dir:
             return
 
-        payload: Dict[str, Any] = {
-            "input_path": in_path,
-            "out_dir": out_dir,
-            "model": "htdemucs_6s",
-            "output_format": "mp3",
-            "mp3_bitrate": self.cmb_bitrate.currentText().strip(),
-            "device": "cpu",
-            "shifts": int(self.spin_shifts.value()),
-            "segment": int(self.spin_segment.value()),
-        }
-
-        self.separationRequested.emit(payload)
+        # The whole selection goes out as one request -> one Demucs run
+        request = SeparationRequest(
+            input_paths=tuple(in_paths),
+            output_dir=out_dir,
+            model="htdemucs_6s",
+            device="cpu",
+            output_format="mp3",
+            mp3_bitrate=int(self.cmb_bitrate.currentText()),
+            segment=self.spin_segment.value(),
+            shifts=self.spin_shifts.value(),
+        )
+
+        self.separationRequested.emit(request)
         
+    @Slot(bool, str)
     def set_busy(self, busy: bool, text: str = ""):
+        if busy:
+            self.progress.setValue(0)
         self.progress.setVisible(busy)
         self.lbl_status.setVisible(busy)
         self.lbl_status.setText(text or ("Separating…" if busy else ""))
         self.btn_separate.setEnabled(not busy)
-
+        self.btn_cancel.setVisible(busy)
+        self.btn_cancel.setEnabled(busy)
+
+    @Slot()
+    def _on_cancel_clicked(self):
+        self.btn_cancel.setEnabled(False)
+        self.lbl_status.setText("Cancelling…")
+        self.cancelRequested.emit()
+
+    @Slot(int)
+    def set_progress(self, pct: int):
+        self.progress.setValue(max(0, min(100, int(pct))))
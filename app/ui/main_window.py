@@ -1,70 +1,123 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import attrgetter
 from pathlib import Path
+import hashlib
 import subprocess
-from typing import Optional, List
+from typing import Optional, List, TYPE_CHECKING
 from PySide6.QtGui import QIcon
 import os
 import sys
 import tempfile
 import shutil
+import threading
+import time
 
 
-from PySide6.QtCore import Qt, QUrl, QObject, Signal, Slot, QThread
+from PySide6.QtCore import (
+    Qt, QUrl, QObject, Signal, Slot, QTimer, QRunnable, QThreadPool,
+    QPropertyAnimation, QEasingCurve, QAbstractAnimation, QElapsedTimer, QStandardPaths,
+)
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QFileDialog, QMessageBox,
     QGroupBox, QFormLayout, QCheckBox, QSpinBox, QSlider, QComboBox,
     QSplitter, QScrollArea, QPlainTextEdit,
-    QTableWidget, QTableWidgetItem, QAbstractItemView, QProgressBar
+    QTableView, QAbstractItemView, QProgressBar
 )
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 
-from app.state import Settings, AnalysisSession, NoteEvent
+from app.pipeline.separation import SeparationCancelled, run_demucs_inprocess
+from app.state import Settings, AnalysisSession, NoteEvent, NoteArrays, SeparationRequest, arrays_to_notes, notes_to_arrays
 from app.ui.piano_roll import PianoRollWidget
-from app.ui.audio_separation_window import AudioSeparationWindow
-from app.transcription.postprocess import apply_tweaks
-from app.pipeline.analyze import analyze_audio
-from app.midi.preview_synth import render_preview_wav
-from app.midi.export_midi import export_midi
+from app.ui.notes_table_model import NotesTableModel
+from app.ui.pcm_player import PcmPlayer
+from app.transcription.postprocess import apply_tweaks_arrays
+from app.utils.cache import file_fingerprint
+
+# The transcription, decode, preview and MIDI export modules (mido, soundfile,
+# FFmpeg lookup, Basic Pitch glue) are imported where first used, not here, so
+# the window can paint before any of them load.
+
+if TYPE_CHECKING:
+    from app.ui.audio_separation_window import AudioSeparationWindow
 
 def resource_path(relative_path: str) -> str:
     """Return an absolute path to a resource (dev + PyInstaller)."""
     base_path = getattr(sys, "_MEIPASS", os.path.abspath("."))
     return os.path.join(base_path, relative_path)
 
+class _WorkerJob(QRunnable):
+    """
+    Runs a worker's run() on a QThreadPool thread. The worker stays a GUI-thread
+    QObject, so its signals reach the window as queued calls without a QThread
+    and moveToThread per job.
+    """
+
+    def __init__(self, worker: QObject):
+        super().__init__()
+        self.worker = worker
+
+    def run(self) -> None:
+        self.worker.run()
+
+
 class AnalyzeWorker(QObject):
     finished = Signal(object)  # AnalysisSession
     failed = Signal(str)
+    cancelled = Signal()
 
-    def __init__(self, input_path: Path):
+    def __init__(self, input_path: Path, cache_dir: Path, decoded_wav_path: Optional[Path] = None):
         super().__init__()
         self.input_path = input_path
+        self.cache_dir = cache_dir
+        self.decoded_wav_path = decoded_wav_path or input_path
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation; safe to call from the GUI thread while run() is busy."""
+        self._cancel.set()
 
-    @Slot()
     def run(self) -> None:
         try:
-            notes, sr, warnings = analyze_audio(self.input_path)
+            from app.pipeline.cache import cached_analyze
+
+            notes, sr, warnings = cached_analyze(self.decoded_wav_path, self.cache_dir, cancel=self._cancel)
+            if self._cancel.is_set():
+                self.cancelled.emit()
+                return
             session = AnalysisSession(
                 input_path=self.input_path,
-                decoded_wav_path=self.input_path,
+                decoded_wav_path=self.decoded_wav_path,
                 sample_rate=sr,
                 raw_notes=notes,
+                raw_arrays=notes_to_arrays(notes),
                 current_notes=notes,
                 warnings=warnings,
             )
             self.finished.emit(session)
         except Exception as e:
-            self.failed.emit(str(e))
+            # AnalysisCancelled, or anything raised while being torn down
+            if self._cancel.is_set():
+                self.cancelled.emit()
+            else:
+                self.failed.emit(str(e))
+
+
+# Every stem name the bundled Demucs models produce (htdemucs_6s adds guitar/piano)
+_DEMUCS_STEM_NAMES = ("vocals", "drums", "bass", "other", "guitar", "piano")
 
 
 class SeparationWorker(QObject):
     progress = Signal(str)
+    percent = Signal(int)
     finished = Signal(dict)
 
     def __init__(
         self,
-        input_path: str,
+        input_paths: list[str],
         out_dir: str,
         overwrite: bool,
         model: str = "htdemucs_6s",
@@ -74,10 +127,13 @@ class SeparationWorker(QObject):
         segment: int = 0,
         shifts: int = 0,
         device: str = "auto",
+        jobs: int = 0,
         parent=None,
     ):
         super().__init__(parent)
-        self.input_path = input_path
+        if isinstance(input_paths, (str, Path)):
+            input_paths = [input_paths]
+        self.input_paths = [str(p) for p in input_paths]
         self.out_dir = out_dir
         self.overwrite = overwrite
         self.model = (model or "htdemucs_6s").strip()
@@ -87,57 +143,90 @@ class SeparationWorker(QObject):
         self.segment = int(segment or 0)
         self.shifts = int(shifts or 0)
         self.device = (device or "auto").lower().strip()
+        self.jobs = int(jobs or 0)  # 0 = pick automatically on CPU runs
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation; safe to call from the GUI thread while run() is busy."""
+        self._cancel.set()
+
+    def _cpu_jobs(self) -> int:
+        """Demucs worker count for CPU runs (0 when running on GPU)."""
+        if self.device == "cuda":
+            return 0
+        if self.device != "cpu":
+            try:
+                import torch  # type: ignore
+                if torch.cuda.is_available():
+                    return 0
+            except Exception:
+                pass
+        if self.jobs > 0:
+            return self.jobs
+        # Each job holds its own model copy, so cap it to keep RAM in check
+        return max(1, min(os.cpu_count() or 1, 4))
 
     @staticmethod
-    def _run_demucs_inprocess(args: list[str]) -> None:
+    def _free_flat_suffix(out_root: Path, in_paths: list[Path], ext: str) -> str:
         """
-        Run demucs separation *in-process*.
-
-        IMPORTANT: In PyInstaller builds, sys.executable points to WaveNotes.exe, so using
-        subprocess([sys.executable, "-m", "demucs", ...]) will relaunch the app.
+        "" or "_N" such that no "<track><suffix>_<stem>.<ext>" already exists in
+        out_root, so a run without Overwrite never replaces earlier stems.
         """
-        demucs_main = None
-        last_err = None
-        for modpath in ("demucs.separate", "demucs.__main__"):
+        stems = _DEMUCS_STEM_NAMES + ("voice",)
+        suffix, i = "", 1
+        while any((out_root / f"{p.stem}{suffix}_{stem}.{ext}").exists() for p in in_paths for stem in stems):
+            i += 1
+            suffix = f"_{i}"
+        return suffix
+
+    @staticmethod
+    def _stems_written_since(out_root: Path, base: str, ext: str, since: float) -> bool:
+        # A little slack for filesystems with coarse mtimes (FAT: 2 s)
+        for stem in _DEMUCS_STEM_NAMES + ("voice",):
             try:
-                mod = __import__(modpath, fromlist=["main"])
-                demucs_main = getattr(mod, "main")
-                break
-            except Exception as e:
-                last_err = e
-
-        if demucs_main is None:
-            raise RuntimeError(f"Could not import Demucs entrypoint. Last error: {last_err}")
-        # PyInstaller --windowed can set stdout/stderr to None.
-        # Demucs writes logs/progress to them, so ensure they exist.
-        if sys.stdout is None:
-            sys.stdout = open(os.devnull, "w", encoding="utf-8")
-        if sys.stderr is None:
-            sys.stderr = open(os.devnull, "w", encoding="utf-8")
-
-        # demucs CLI often uses SystemExit to exit; treat nonzero as failure
-        try:
-            demucs_main(args)
-        except SystemExit as e:
-            code = getattr(e, "code", 0)
-            if code not in (0, None):
-                raise RuntimeError(f"Demucs exited with code {code}") from e
+                if (out_root / f"{base}_{stem}.{ext}").stat().st_mtime >= since - 2.0:
+                    return True
+            except OSError:
+                pass
+        return False
 
     @staticmethod
-    def _find_stems_recursive(out_root: Path) -> dict[str, Path]:
+    def _find_stems(track_dir: Path) -> dict[str, Path]:
+        """Standard stems (vocals.wav, drums.mp3, ...) inside one Demucs track folder."""
         stems: dict[str, Path] = {}
-        for stem in ("vocals", "drums", "bass", "other"):
-            hits = list(out_root.rglob(f"{stem}.*"))  # vocals.wav or vocals.mp3 etc.
-            if hits:
-                hits.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-                stems[stem] = hits[0]
+        try:
+            with os.scandir(track_dir) as it:
+                for e in it:
+                    stem, dot, _ext = e.name.partition(".")
+                    if dot and stem in ("vocals", "drums", "bass", "other") and e.is_file():
+                        stems[stem] = Path(e.path)
+        except OSError:
+            pass
         return stems
 
-    @Slot()
+    def _find_track_stems(self, out_root: Path, in_path: Path) -> dict[str, Path]:
+        model_dir = out_root / self.model
+        # Demucs names the folder after the input, so look there first
+        stems = self._find_stems(model_dir / in_path.stem)
+        if stems:
+            return stems
+        # Otherwise take the most recently written track folder; DirEntry.stat()
+        # reuses the scandir result instead of a separate stat per path.
+        try:
+            with os.scandir(model_dir) as it:
+                dirs = [(e.stat(follow_symlinks=False).st_mtime, e.path) for e in it if e.is_dir()]
+        except OSError:
+            return {}
+        for _mtime, d in sorted(dirs, reverse=True):
+            stems = self._find_stems(Path(d))
+            if stems:
+                return stems
+        return {}
+
     def run(self) -> None:
         """Run Demucs separation and (optionally) flatten outputs into the chosen output folder."""
         try:
-            in_path = Path(self.input_path)
+            in_paths = [Path(p) for p in self.input_paths]
             out_root = Path(self.out_dir)
             out_root.mkdir(parents=True, exist_ok=True)
 
@@ -158,94 +247,249 @@ class SeparationWorker(QObject):
             if self.device in ("cpu", "cuda"):
                 args += ["--device", self.device]
 
-            args.append(str(in_path))
-
-            self.progress.emit(f"Separating audio (Demucs {self.model})…")
+            # Demucs defaults to a single worker, which leaves CPU cores idle
+            jobs = self._cpu_jobs()
+            if jobs > 1:
+                args += ["-j", str(jobs)]
+
+            # Write stems straight to their flat names: Demucs resolves --filename
+            # against out_root/<model>/, so "../" lands them in out_root itself and
+            # there's no nested tree to move files out of afterwards.
+            ext = "mp3" if self.output_format == "mp3" else "wav"
+            suffix = ""
+            if self.flat_naming:
+                if not self.overwrite:
+                    suffix = self._free_flat_suffix(out_root, in_paths, ext)
+                args += ["--filename", "../{track}" + suffix + "_{stem}.{ext}"]
+
+            # All inputs go into one Demucs run so the model is loaded only once
+            args += [str(p) for p in in_paths]
+
+            if len(in_paths) == 1:
+                self.progress.emit(f"Separating audio (Demucs {self.model})…")
+            else:
+                self.progress.emit(f"Separating {len(in_paths)} files (Demucs {self.model})…")
 
             # Run in-process (no subprocess -> no second WaveNotes window)
-            self._run_demucs_inprocess(args)
-
-            stems = self._find_stems_recursive(out_root)
-            if not stems:
-                self.finished.emit({
-                    "ok": False,
-                    "out_dir": str(out_root),
-                    "error": f"Demucs finished but no stem files were found under: {out_root}"
-                })
-                return
+            started = time.time()
+            run_demucs_inprocess(
+                args,
+                on_percent=self.percent.emit,
+                on_line=self.progress.emit,
+                cancelled=self._cancel.is_set,
+            )
 
-            # If we are not flattening, just report success.
+            # If we are not flattening, stems stay in Demucs' out_root/<model>/<track>/ layout.
             if not self.flat_naming:
+                if not any(self._find_track_stems(out_root, p) for p in in_paths):
+                    self.finished.emit({
+                        "ok": False,
+                        "out_dir": str(out_root),
+                        "error": f"Demucs finished but no stem files were found under: {out_root}"
+                    })
+                    return
                 self.finished.emit({"ok": True, "out_dir": str(out_root), "error": None})
                 return
 
-            stem_map = {"vocals": "voice", "drums": "drums", "bass": "bass", "other": "other"}
-            base = in_path.stem
-            moved_any = False
-
-            for stem, src in stems.items():
-                suffix = src.suffix  # keep actual produced extension
-                dst = out_root / f"{base}_{stem_map.get(stem, stem)}{suffix}"
-
-                if dst.exists():
-                    if self.overwrite:
-                        try:
-                            dst.unlink()
-                        except Exception:
-                            pass
-                    else:
-                        continue
-
+            found_any = False
+            for in_path in in_paths:
+                base = in_path.stem + suffix
+                # Only "vocals" differs from the names we show ("voice")
+                src = out_root / f"{base}_vocals.{ext}"
+                dst = out_root / f"{base}_voice.{ext}"
+                # Same-directory rename, so os.replace never has to fall back to a copy
                 try:
-                    src.replace(dst)
-                except Exception:
-                    shutil.copy2(src, dst)
-                    try:
-                        src.unlink()
-                    except Exception:
-                        pass
-
-                moved_any = True
+                    os.replace(src, dst)
+                except FileNotFoundError:
+                    pass
+                # Leftovers from an earlier run (same names when Overwrite is on) don't count
+                found_any = found_any or self._stems_written_since(out_root, base, ext, started)
 
-            if not moved_any:
+            if not found_any:
                 self.finished.emit({
                     "ok": False,
                     "out_dir": str(out_root),
-                    "error": "Demucs finished but stem filenames were unexpected (no standard stems to move)."
+                    "error": f"Demucs finished but no stem files were found under: {out_root}"
                 })
                 return
 
-            # Remove Demucs nested output folder (e.g., out_root/htdemucs_6s/...)
-            # so the user only sees the final stem files in the chosen output folder.
-           
-
-            # Best-effort cleanup of empty directories left by Demucs
+            # Demucs still creates the (now empty) out_root/<model> folder
             try:
-                dirs = sorted([d for d in out_root.rglob("*") if d.is_dir()], key=lambda d: len(str(d)), reverse=True)
-                for d in dirs:
-                    try:
-                        next(d.iterdir())
-                    except StopIteration:
-                        d.rmdir()
-            except Exception:
+                (out_root / self.model).rmdir()
+            except OSError:
                 pass
 
             self.finished.emit({"ok": True, "out_dir": str(out_root), "error": None})
 
         except Exception as e:
+            if isinstance(e, SeparationCancelled) or self._cancel.is_set():
+                self.finished.emit({"ok": False, "out_dir": self.out_dir, "error": "Cancelled by user."})
+                return
             self.finished.emit({"ok": False, "out_dir": self.out_dir, "error": str(e)})
 
+# In-memory playback PCM (48 kHz stereo s16 = ~11 MB/min); longer files stay on QMediaPlayer
+_PLAYBACK_SR = 48000
+_PLAYBACK_CHANNELS = 2
+_PLAYBACK_PCM_MAX_SEC = 10 * 60
+
+
+class _PredecodeSignals(QObject):
+    # (input path, decoded wav path or "", PCM bytearray or None, error text or "")
+    done = Signal(str, str, object, str)
+
+
+class _PredecodeJob(QRunnable):
+    """
+    Decodes a newly opened file once in the background: to the analyzer's 16 kHz
+    mono WAV and, if it is short enough, to in-memory PCM for PcmPlayer (so seeks
+    don't go through the media backend). Both come from the same FFmpeg run.
+    """
+
+    def __init__(self, input_path: Path, out_wav: Path):
+        super().__init__()
+        self.input_path = input_path
+        self.out_wav = out_wav
+        self.signals = _PredecodeSignals()
+
+    def run(self) -> None:
+        wav = ""
+        pcm = None
+        error = ""
+        tmp = None
+        try:
+            from app.audio.io import decode_to_s16le, decode_to_wav, probe_duration_sec
+
+            # The name is the file's fingerprint, so an existing WAV is already this
+            # decode. Otherwise decode beside it and swap in, so a reopen never
+            # truncates a WAV an earlier analysis may still be reading.
+            if not self.out_wav.exists():
+                fd, tmp = tempfile.mkstemp(dir=self.out_wav.parent, prefix=self.out_wav.stem, suffix=".tmp.wav")
+                os.close(fd)
+
+            duration = probe_duration_sec(self.input_path)
+            if duration is not None and duration <= _PLAYBACK_PCM_MAX_SEC:
+                pcm = decode_to_s16le(
+                    self.input_path, _PLAYBACK_SR, _PLAYBACK_CHANNELS, duration,
+                    wav_path=Path(tmp) if tmp else None, wav_sr=16000,
+                ) or None
+            elif tmp:
+                decode_to_wav(self.input_path, Path(tmp), target_sr=16000)
+            if tmp:
+                os.replace(tmp, self.out_wav)
+            wav = str(self.out_wav)
+        except Exception as e:
+            error = str(e)
+        finally:
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
+        self.signals.done.emit(str(self.input_path), wav, pcm, error)
+
+
+class _RemoveTreeJob(QRunnable):
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = path
+
+    def run(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class _WarmUpKernelsJob(QRunnable):
+    def run(self) -> None:
+        from app.transcription.postprocess import warm_up_kernels
+
+        warm_up_kernels()
+
+
+class _StemMidiExportSignals(QObject):
+    done = Signal(bool, list)  # (ok, log lines)
+
+
+class _StemMidiExportJob(QRunnable):
+    """Writes transcribed stems to MIDI (one multi-track file, per-stem files, or merged)."""
+
+    def __init__(self, notes_by_stem: dict, out_dir: Path, multitrack: bool, tempo_bpm: int):
+        super().__init__()
+        self.notes_by_stem = notes_by_stem
+        self.out_dir = out_dir
+        self.multitrack = multitrack
+        self.tempo_bpm = tempo_bpm
+        self.signals = _StemMidiExportSignals()
+
+    def run(self) -> None:
+        out_path = self.out_dir / "wavenotes_stems.mid"
+        lines: list[str] = []
+        try:
+            from app.midi.export_midi import export_midi, export_multitrack_midi
+
+            if self.multitrack:
+                export_multitrack_midi(self.notes_by_stem, out_path, tempo_bpm=self.tempo_bpm)
+                lines.append(f"✅ Exported multi-track MIDI: {out_path}")
+            else:
+                merged = []
+                for notes in self.notes_by_stem.values():
+                    merged.extend(notes)
+                merged.sort(key=attrgetter("start_sec", "midi_pitch"))
+                export_midi(merged, out_path, tempo_bpm=self.tempo_bpm)
+                lines.append(f"✅ Exported merged MIDI: {out_path}")
+        except Exception as e:
+            lines.append(f"❌ Export failed: {e}")
+            self.signals.done.emit(False, lines)
+            return
+        self.signals.done.emit(True, lines)
+
+
+# Above this many raw notes, tweak recomputes run on the thread pool
+_TWEAK_ASYNC_MIN_NOTES = 2000
+# Recent tweak results kept per analysis, so flipping back to earlier settings is instant
+_TWEAK_CACHE_SIZE = 8
+# Rendered preview WAVs kept in the per-user cache across runs (least recently
+# played are pruned first)
+_PREVIEW_CACHE_FILES = 8
+
+
+class _TweakSignals(QObject):
+    done = Signal(int, object)  # (generation, (NoteArrays, list[NoteEvent]))
+
+
+class _TweakJob(QRunnable):
+    """Runs apply_tweaks off the GUI thread for large sessions."""
+
+    def __init__(self, generation: int, raw_arrays: NoteArrays, settings: Settings):
+        super().__init__()
+        self.generation = generation
+        self.raw_arrays = raw_arrays
+        self.settings = settings
+        self.signals = _TweakSignals()
+
+    def run(self) -> None:
+        self.signals.done.emit(self.generation, _tweak(self.raw_arrays, self.settings))
+
+
+def _tweak(raw_arrays: NoteArrays, settings: Settings) -> tuple[NoteArrays, List[NoteEvent]]:
+    arrays = apply_tweaks_arrays(raw_arrays, settings)
+    return arrays, arrays_to_notes(*arrays)
+
+
+def _preview_key(arrays: NoteArrays, sr: int) -> str:
+    # Velocity, tempo and grid are already baked into the tweaked notes
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        h.update(a.tobytes())
+    h.update(int(sr).to_bytes(4, "little"))
+    return h.hexdigest()
+
+
 class PreviewRenderWorker(QObject):
     finished = Signal(bool, str)  # ok, message
 
     def __init__(self, owner: "MainWindow"):
-        super().__init__(owner)
+        super().__init__()
         self.owner = owner
 
-    @Slot()
     def run(self) -> None:
         try:
-            p = self.owner._ensure_preview_wav(force=True)
+            p = self.owner._ensure_preview_wav()
             if not p:
                 self.finished.emit(False, "No notes to render.")
                 return
@@ -257,19 +501,34 @@ class TranscribeStemsWorker(QObject):
     progress = Signal(str)
     finished = Signal(dict)  # {"ok": bool, "notes_by_stem": dict[str, list[NoteEvent]], "error": str|None}
 
-    def __init__(self, stem_paths: list[str], parent=None):
+    def __init__(self, stem_paths: list[str], cache_dir: Path, parent=None):
         super().__init__(parent)
         self.stem_paths = stem_paths
+        self.cache_dir = cache_dir
 
-    @Slot()
     def run(self) -> None:
         try:
-            notes_by_stem: dict[str, list[NoteEvent]] = {}
-            for i, sp in enumerate(self.stem_paths, start=1):
-                name = Path(sp).stem
-                self.progress.emit(f"Transcribing stem {i}/{len(self.stem_paths)}: {name}")
-                notes, sr, warnings = analyze_audio(Path(sp))
-                notes_by_stem[name] = notes
+            from app.pipeline.cache import cached_analyze
+
+            names = [Path(sp).stem for sp in self.stem_paths]
+            results: dict[str, list[NoteEvent]] = {}
+            total = len(self.stem_paths)
+            # Stems are independent and transcription spends its time in native code
+            # (FFmpeg + the model), so transcribe them concurrently. The model itself
+            # is shared and its inference bounded in analyze (_BASIC_PITCH_SLOTS).
+            workers = max(1, min(total, os.cpu_count() or 1, 4))
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                futs = {
+                    ex.submit(cached_analyze, Path(sp), self.cache_dir): name
+                    for sp, name in zip(self.stem_paths, names)
+                }
+                for done, fut in enumerate(as_completed(futs), start=1):
+                    name = futs[fut]
+                    notes, sr, warnings = fut.result()
+                    results[name] = notes
+                    self.progress.emit(f"Transcribed stem {done}/{total}: {name}")
+            # Keep the caller's stem order (track order of the multitrack export)
+            notes_by_stem = {name: results[name] for name in names}
             self.finished.emit({"ok": True, "notes_by_stem": notes_by_stem, "error": None})
         except Exception as e:
             self.finished.emit({"ok": False, "notes_by_stem": {}, "error": str(e)})
@@ -282,28 +541,65 @@ class MainWindow(QMainWindow):
         self.resize(1400, 820)
         self.setWindowIcon(QIcon(resource_path("assets/icon/WaveNotes.ico")))
         self._session_cache_dir = Path(tempfile.mkdtemp(prefix="wavenotes_"))
+        # Preview WAVs are keyed by note content, so they stay valid across runs and
+        # live in the persistent per-user cache rather than the session folder
+        user_cache = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        self._preview_cache_dir = Path(user_cache) / "preview" if user_cache else self._session_cache_dir / "preview"
         self.session: Optional[AnalysisSession] = None
         self.current_notes: List[NoteEvent] = []
-        self._preview_wav_path: Optional[Path] = None
-        self._preview_thread: Optional[QThread] = None
+        self._play_after_render = False
         self._preview_worker: Optional[PreviewRenderWorker] = None
+        # Transcription, separation and preview rendering; long jobs get their own pool
+        # so the short ones (tweaks, decodes) on the global pool never queue behind them
+        self._worker_pool = QThreadPool(self)
+        self._worker_pool.setMaxThreadCount(4)
+        self._shown_notes: Optional[List[NoteEvent]] = None  # list the piano roll and table show
+        self._current_arrays: NoteArrays = notes_to_arrays([])  # current_notes as column arrays
         self._notes_t0: float = 0.0  # min start time of current notes for playhead mapping
         self._sep_win: Optional[AudioSeparationWindow] = None
 
+        # Tweak controls fire on every step of a drag; coalesce into one recompute
+        self._tweak_generation = 0
+        self._tweak_job: Optional[_TweakJob] = None
+        self._tweak_settings: Optional[Settings] = None  # settings of the latest generation
+        self._tweak_cache: OrderedDict[Settings, tuple[NoteArrays, List[NoteEvent]]] = OrderedDict()
+        self._tweak_cache_raw: Optional[NoteArrays] = None  # raw arrays the cache was built from
+        self._predecode_job: Optional[_PredecodeJob] = None
+        self._stem_export_job: Optional[_StemMidiExportJob] = None
+        self._tweak_timer = QTimer(self)
+        self._tweak_timer.setSingleShot(True)
+        self._tweak_timer.setInterval(60)
+        self._tweak_timer.timeout.connect(self.reapply_tweaks)
+
         self.audio_path: str = ""
 
         # Smooth scroll state
-        self._last_scroll_target: Optional[int] = None
+        self._scroll_anim = QPropertyAnimation(self)
+        self._scroll_anim.setPropertyName(b"value")
+        self._scroll_anim.setDuration(180)
+        self._scroll_anim.setEasingCurve(QEasingCurve.OutCubic)
 
         # Players
         self.audio_out = QAudioOutput()
         self.audio_player = QMediaPlayer()
         self.audio_player.setAudioOutput(self.audio_out)
+        # Takes over from audio_player once the opened file is decoded to PCM
+        self.audio_pcm = PcmPlayer(self)
 
         self.midi_out = QAudioOutput()
         self.midi_player = QMediaPlayer()
         self.midi_player.setAudioOutput(self.midi_out)
 
+        # positionChanged only arrives every ~30-100 ms (backend dependent); a 16 ms
+        # clock extrapolates from the last report so the playhead moves every frame.
+        self._midi_pos_anchor_ms = 0
+        self._midi_pos_elapsed = QElapsedTimer()
+        self._midi_pos_elapsed.start()
+        self._midi_clock = QTimer(self)
+        self._midi_clock.setInterval(16)
+        self._midi_clock.setTimerType(Qt.PreciseTimer)
+        self._midi_clock.timeout.connect(self._tick_midi_playhead)
+
         central = QWidget()
         self.setCentralWidget(central)
         root = QVBoxLayout(central)
@@ -552,8 +848,9 @@ class MainWindow(QMainWindow):
         # --- Notes preview
         table_box = QGroupBox("Notes preview")
         table_layout = QVBoxLayout(table_box)
-        self.table = QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(["Start", "End", "Dur", "Pitch", "Note", "Vel"])
+        self.notes_model = NotesTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.notes_model)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QAbstractItemView.SingleSelection)
@@ -598,6 +895,8 @@ class MainWindow(QMainWindow):
         # Audio seek
         self.audio_player.positionChanged.connect(self._on_audio_pos)
         self.audio_player.durationChanged.connect(self._on_audio_dur)
+        self.audio_pcm.positionChanged.connect(self._on_audio_pos)
+        self.audio_pcm.durationChanged.connect(self._on_audio_dur)
         self.slider_audio.sliderMoved.connect(self._on_audio_seek)
 
         # MIDI seek + playhead
@@ -614,14 +913,20 @@ class MainWindow(QMainWindow):
             self.combo_grid, self.slider_q,
         ]:
             if hasattr(w, "valueChanged"):
-                w.valueChanged.connect(self.reapply_tweaks)
+                w.valueChanged.connect(self._schedule_tweaks)
             if hasattr(w, "stateChanged"):
-                w.stateChanged.connect(self.reapply_tweaks)
+                w.stateChanged.connect(self._schedule_tweaks)
             if hasattr(w, "currentIndexChanged"):
-                w.currentIndexChanged.connect(self.reapply_tweaks)
+                w.currentIndexChanged.connect(self._schedule_tweaks)
 
         self._log("WaveNotes ready.")
 
+    @Slot()
+    def _schedule_tweaks(self) -> None:
+        # No-arg on purpose: connected straight to QTimer.start, the signals' value
+        # would bind to start(int) and replace the debounce interval
+        self._tweak_timer.start()
+
     def _center_on_screen(self) -> None:
         """Center the window on the current screen and ensure it fits."""
         try:
@@ -655,7 +960,8 @@ class MainWindow(QMainWindow):
     def _autoscroll_piano_to_playhead(self, playhead_time_sec: float) -> None:
         """
         Smoothly keep the MIDI playhead visible by scrolling the piano roll horizontally.
-        This uses a simple exponential smoothing toward a target scroll position.
+        When the playhead leaves the comfort margin, one eased scroll animation moves it
+        back to the left margin; between those jumps the scrollbar isn't touched.
         """
         if not hasattr(self, "roll_scroll") or self.roll_scroll is None:
             return
@@ -680,37 +986,32 @@ class MainWindow(QMainWindow):
         margin = max(40, viewport_w // 3)
 
         target = None
-        if x < left + margin:
-            target = max(0, x - margin)
-        elif x > right - margin:
-            target = max(0, x - viewport_w + margin)
-
-        if target is None:
-            self._last_scroll_target = None
-            return
+        if x < left + margin or x > right - margin:
+            # Park the playhead at the left margin: a full page of runway before the next scroll
+            target = min(max(0, x - margin), hbar.maximum())
 
-        # Smooth scrolling: move partway toward target on each update
-        current = hbar.value()
-        if self._last_scroll_target is None:
-            # First time: start close so it doesn't snap too hard
-            self._last_scroll_target = target
+        anim = self._scroll_anim
+        if target is None or anim.state() == QAbstractAnimation.Running:
+            return  # in view, or already scrolling toward it
 
-        alpha = 0.22  # smaller = smoother, larger = snappier
-        new_val = int(round(current + alpha * (target - current)))
-
-        # If close enough, snap to target to avoid jitter
-        if abs(target - new_val) <= 2:
-            new_val = target
+        if abs(target - hbar.value()) <= 2:
+            return
 
-        hbar.setValue(new_val)
-        self._last_scroll_target = target
+        if anim.targetObject() is not hbar:
+            anim.setTargetObject(hbar)
+        anim.setStartValue(hbar.value())
+        anim.setEndValue(target)
+        anim.start()
 
     # ---------------- Audio Separation Window ----------------
     # ---------------- Audio Separation Window ----------------
     def open_separation_window(self) -> None:
         if self._sep_win is None:
+            # Imported on first use so app startup doesn't build the dialog module
+            from app.ui.audio_separation_window import AudioSeparationWindow
             self._sep_win = AudioSeparationWindow(parent=self)
             self._sep_win.separationRequested.connect(self._start_separation)
+            self._sep_win.cancelRequested.connect(self._cancel_separation)
         # Prefill current audio if available
         try:
             cur = (getattr(self, 'audio_path', '') or '').strip()
@@ -734,6 +1035,12 @@ class MainWindow(QMainWindow):
             return
 
         p = Path(path)
+        try:
+            fingerprint = file_fingerprint(p)
+        except OSError as e:
+            self._log(f"❌ Cannot open {p}: {e}")
+            return
+        self._cancel_analyze()
         self.audio_path = str(p)
         self.session = AnalysisSession(input_path=p, decoded_wav_path=p, sample_rate=44100)
         self.lbl_file.setText(str(p))
@@ -748,40 +1055,90 @@ class MainWindow(QMainWindow):
         self.slider_midi.setEnabled(False)
         self.piano.set_playhead_time(None)
 
-        # Reset smooth scroll state
-        self._last_scroll_target = None
+        # Decode once while the user looks around: Analyze then reads the cached
+        # WAV, and playback switches to the in-memory PCM from the same FFmpeg run.
+        self._predecode_job = _PredecodeJob(p, self._session_cache_dir / f"{fingerprint}_16000.wav")
+        self._predecode_job.signals.done.connect(self._on_predecoded)
+        QThreadPool.globalInstance().start(self._predecode_job)
 
-        # Load audio source
+        # Load audio source (the original: the analysis WAV is 16 kHz mono).
+        # QMediaPlayer plays it until the in-memory PCM copy is ready.
+        self.audio_pcm.unload()
+        self.audio_player.blockSignals(False)
         self.audio_player.setSource(QUrl.fromLocalFile(str(p)))
         self.btn_audio_pause.setEnabled(True)
         self.btn_audio_stop.setEnabled(True)
 
         self._log(f"Selected: {p}")
 
+    @Slot(str, str, object, str)
+    def _on_predecoded(self, input_path: str, wav_path: str, pcm: Optional[bytearray], error: str) -> None:
+        job = self._predecode_job
+        if job is None or self.sender() is not job.signals:
+            return  # an earlier file's decode; a newer one is in flight
+        self._predecode_job = None
+        if not self.session or str(self.session.input_path) != input_path:
+            return
+        if wav_path:
+            self.session.decoded_wav_path = Path(wav_path)
+        if error:
+            self._log(f"⚠ Decode failed, using the media player for playback: {error}")
+        if not pcm:
+            return  # keep QMediaPlayer (undecodable or too long)
+
+        # Hand over mid-playback without losing the position
+        pos = self.audio_player.position()
+        playing = self.audio_player.playbackState().name == "PlayingState"
+        if not self.audio_pcm.load(pcm, _PLAYBACK_SR, _PLAYBACK_CHANNELS):
+            return  # the output device can't take the PCM format; keep QMediaPlayer
+        self.audio_player.stop()
+        # Its late position/duration updates would fight PcmPlayer's over the slider
+        self.audio_player.blockSignals(True)
+        self.audio_player.setSource(QUrl())
+        self.audio_pcm.setPosition(pos)
+        if playing:
+            self.audio_pcm.play()
+
     # ---------------- Audio playback ----------------
+    def _audio(self):
+        """The active audio backend: PcmPlayer once loaded, else QMediaPlayer."""
+        return self.audio_pcm if self.audio_pcm.isLoaded() else self.audio_player
+
     def play_audio(self) -> None:
         if not self.session:
             return
-        self.audio_player.play()
+        self._audio().play()
 
     def pause_audio(self) -> None:
-        self.audio_player.pause()
+        self._audio().pause()
 
     def stop_audio(self) -> None:
-        self.audio_player.stop()
+        self._audio().stop()
 
     def _on_audio_dur(self, dur_ms: int) -> None:
         self.slider_audio.setEnabled(dur_ms > 0)
 
+    @staticmethod
+    def _sync_seek_slider(slider: QSlider, pos_ms: int, dur: int) -> None:
+        # positionChanged fires ~30x/s but the 0..1000 slider only moves every
+        # dur/1000 ms; skip the redundant writes and don't echo valueChanged.
+        if dur <= 0 or slider.isSliderDown():
+            return
+        v = int((pos_ms / dur) * 1000)
+        if v == slider.value():
+            return
+        slider.blockSignals(True)
+        slider.setValue(v)
+        slider.blockSignals(False)
+
     def _on_audio_pos(self, pos_ms: int) -> None:
-        dur = self.audio_player.duration()
-        if dur > 0 and not self.slider_audio.isSliderDown():
-            self.slider_audio.setValue(int((pos_ms / dur) * 1000))
+        self._sync_seek_slider(self.slider_audio, pos_ms, self._audio().duration())
 
     def _on_audio_seek(self, value: int) -> None:
-        dur = self.audio_player.duration()
+        audio = self._audio()
+        dur = audio.duration()
         if dur > 0:
-            self.audio_player.setPosition(int((value / 1000) * dur))
+            audio.setPosition(int((value / 1000) * dur))
 
     # ---------------- Analyze ----------------
     def start_analyze(self) -> None:
@@ -795,21 +1152,28 @@ class MainWindow(QMainWindow):
         self.progress_analyze.setFormat("Transcribing…")
         self.btn_analyze.setEnabled(False)
 
-        self._thread = QThread()
-        self._worker = AnalyzeWorker(self.session.input_path)
-        self._worker.moveToThread(self._thread)
-
-        self._thread.started.connect(self._worker.run)
+        self._worker = AnalyzeWorker(
+            self.session.input_path, self._session_cache_dir, decoded_wav_path=self.session.decoded_wav_path
+        )
         self._worker.finished.connect(self._on_analyze_done)
         self._worker.failed.connect(self._on_analyze_failed)
+        self._worker_pool.start(_WorkerJob(self._worker))
 
-        self._worker.finished.connect(self._thread.quit)
-        self._worker.finished.connect(self._worker.deleteLater)
-        self._thread.finished.connect(self._thread.deleteLater)
-
-        self._thread.start()
+    def _cancel_analyze(self) -> None:
+        """Stop a running transcription whose result is no longer wanted."""
+        worker = getattr(self, "_worker", None)
+        if worker is None:
+            return
+        self._worker = None
+        # Detach first so a result that lands before the worker notices is dropped
+        worker.finished.disconnect(self._on_analyze_done)
+        worker.failed.disconnect(self._on_analyze_failed)
+        worker.cancel()
+        self._log("Transcription cancelled.")
+        self.progress_analyze.setVisible(False)
 
     def _on_analyze_done(self, session_obj: object) -> None:
+        self._worker = None
         self.session = session_obj  # type: ignore
 
         for w in getattr(self.session, "warnings", []):
@@ -834,11 +1198,15 @@ class MainWindow(QMainWindow):
         self.btn_midi_pause.setEnabled(True)
         self.btn_midi_stop.setEnabled(True)
 
-        self.reapply_tweaks()
+        # Synchronous so the preview render below sees the tweaked notes; this one
+        # runs on the Python paths while the numba kernels compile on the pool
+        QThreadPool.globalInstance().start(_WarmUpKernelsJob())
+        self._apply_tweaks_now()
 
         self._kickoff_preview_render()
 
     def _on_analyze_failed(self, err: str) -> None:
+        self._worker = None
         self._log(f"Transcription failed: {err}")
         QMessageBox.critical(self, "Transcription failed", err)
         self.btn_analyze.setEnabled(True)
@@ -864,92 +1232,165 @@ class MainWindow(QMainWindow):
         if not self.session or not getattr(self.session, "raw_notes", None):
             return
 
-        s = self.current_settings()
-        self.current_notes = apply_tweaks(self.session.raw_notes, s)
+        if len(self.session.raw_notes) <= _TWEAK_ASYNC_MIN_NOTES or self._cached_tweak(self.current_settings()):
+            self._apply_tweaks_now()
+            return
+
+        self._tweak_generation += 1
+        self._tweak_settings = self.current_settings()
+        # Hold the job so its signals object outlives the queued delivery
+        self._tweak_job = _TweakJob(self._tweak_generation, self._raw_arrays(), self._tweak_settings)
+        self._tweak_job.signals.done.connect(self._on_tweaks_applied)
+        QThreadPool.globalInstance().start(self._tweak_job)
+
+    def _apply_tweaks_now(self) -> None:
+        if not self.session or not getattr(self.session, "raw_notes", None):
+            return
+        self._tweak_generation += 1
+        self._tweak_settings = settings = self.current_settings()
+        result = self._cached_tweak(settings) or _tweak(self._raw_arrays(), settings)
+        self._on_tweaks_applied(self._tweak_generation, result)
+
+    def _cached_tweak(self, settings: Settings) -> Optional[tuple[NoteArrays, List[NoteEvent]]]:
+        raw = self._raw_arrays()
+        if raw is not self._tweak_cache_raw:
+            # New analysis (or rebuilt raw arrays): earlier results no longer apply
+            self._tweak_cache.clear()
+            self._tweak_cache_raw = raw
+        hit = self._tweak_cache.get(settings)
+        if hit is not None:
+            self._tweak_cache.move_to_end(settings)
+        return hit
+
+    def _raw_arrays(self) -> NoteArrays:
+        # Built once by AnalyzeWorker; rebuilt only if raw_notes was swapped out since
+        arrays = self.session.raw_arrays
+        if arrays is None or len(arrays[0]) != len(self.session.raw_notes):
+            arrays = self.session.raw_arrays = notes_to_arrays(self.session.raw_notes)
+        return arrays
+
+    @Slot(int, object)
+    def _on_tweaks_applied(self, generation: int, result: tuple[NoteArrays, List[NoteEvent]]) -> None:
+        if generation != self._tweak_generation or not self.session:
+            return  # superseded by a newer tweak
+        if self._tweak_settings is not None and self._tweak_cache_raw is self.session.raw_arrays:
+            self._tweak_cache[self._tweak_settings] = result
+            self._tweak_cache.move_to_end(self._tweak_settings)
+            while len(self._tweak_cache) > _TWEAK_CACHE_SIZE:
+                self._tweak_cache.popitem(last=False)
+        arrays, notes = result
+        self.current_notes = notes
         self.session.current_notes = self.current_notes
 
-        self._notes_t0 = min((n.start_sec for n in self.current_notes), default=0.0)
-        self._update_views()
-
-    def _midi_name(self, midi: int) -> str:
-        names = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
-        octave = (int(midi) // 12) - 1
-        return f"{names[int(midi) % 12]}{octave}"
-
-    def _update_views(self) -> None:
-        self.piano.set_notes(self.current_notes)
-
-        self.table.setRowCount(0)
-        for n in self.current_notes[:2000]:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            dur = n.end_sec - n.start_sec
-            note_name = self._midi_name(n.midi_pitch)
-            vals = [
-                f"{n.start_sec:.3f}",
-                f"{n.end_sec:.3f}",
-                f"{dur:.3f}",
-                str(n.midi_pitch),
-                note_name,
-                str(n.velocity),
-            ]
-            for c, v in enumerate(vals):
-                self.table.setItem(row, c, QTableWidgetItem(v))
+        # Sorted by start, so the first start is the minimum
+        self._notes_t0 = float(arrays[0][0]) if len(arrays[0]) else 0.0
+        self._update_views(arrays)
+
+    def _update_views(self, arrays: Optional[NoteArrays] = None) -> None:
+        if self.current_notes is self._shown_notes:
+            return  # tweak cache handed back the list already on screen
+        self._shown_notes = self.current_notes
+        # Both views read the same column arrays; build them once if the caller has none
+        if arrays is None:
+            arrays = notes_to_arrays(self.current_notes)
+        self._current_arrays = arrays
+        self.piano.set_notes(self.current_notes, arrays)
+
+        # One model reset; the view only formats the rows it shows
+        self.notes_model.set_arrays(arrays)
 
     def _kickoff_preview_render(self) -> None:
-        """Pre-render preview.wav in a background thread so first Play MIDI is instant."""
+        """Pre-render the preview WAV in a background thread so first Play MIDI is instant."""
         if not self.session or not self.current_notes:
             return
 
-        if self._preview_thread is not None:
-            try:
-                if self._preview_thread.isRunning():
-                    return
-            except Exception:
-                pass
-        self._preview_thread = QThread(self)
+        if self._preview_worker is not None:
+            return  # already rendering; _on_preview_render_done re-checks the notes
         self._preview_worker = PreviewRenderWorker(self)
-        self._preview_worker.moveToThread(self._preview_thread)
-
-        self._preview_thread.started.connect(self._preview_worker.run)
         self._preview_worker.finished.connect(self._on_preview_render_done)
-
-        self._preview_worker.finished.connect(self._preview_thread.quit)
-        self._preview_worker.finished.connect(self._preview_worker.deleteLater)
-        self._preview_thread.finished.connect(self._preview_thread.deleteLater)
-
-        self._preview_thread.start()
+        self._worker_pool.start(_WorkerJob(self._preview_worker))
 
     def _on_preview_render_done(self, ok: bool, msg: str) -> None:
+        self._preview_worker = None
+        # A pending Play applies to this render only; a failed one must not leave it
+        # armed for the next background pre-render
+        play, self._play_after_render = self._play_after_render, False
         if ok:
             self._log(msg)
         else:
             self._log(f"⚠ {msg}")
+        if ok and play:
+            self.play_midi()
+
     # ---------------- MIDI preview (renders wav) ----------------
+    def _preview_path(self, key: str) -> Path:
+        return self._preview_cache_dir / f"preview_{key}.wav"
+
     def _ensure_preview_wav(self, force: bool = False) -> Optional[Path]:
-        if not self.session or not self.current_notes:
+        """
+        Return preview_<key>.wav for the current notes, rendering it only when no
+        file for exactly these notes is cached yet (or force is set).
+        """
+        # One snapshot for key and render; the UI thread may swap in new notes meanwhile
+        arrays = self._current_arrays
+        if not self.session or not len(arrays[0]):
             return None
 
-        cache_dir = self._session_cache_dir / "preview"
-        cache_dir.mkdir(parents=True, exist_ok=True)
-
-        out = cache_dir / "preview.wav"
-        if (not force) and out.exists() and self._preview_wav_path == out:
+        sr = int(getattr(self.session, "sample_rate", 44100))
+        out = self._preview_path(_preview_key(arrays, sr))
+        if (not force) and out.exists():
+            try:
+                os.utime(out)  # mtime doubles as the LRU stamp
+            except OSError:
+                pass
             return out
 
-        render_preview_wav(self.current_notes, out, sr=int(getattr(self.session, "sample_rate", 44100)))
-        self._preview_wav_path = out
+        from app.midi.preview_synth import render_preview_wav_arrays
+
+        out.parent.mkdir(parents=True, exist_ok=True)
+        # Render beside the target and swap in, so a half-written file is never cached.
+        # The cache dir is shared by every running window, so the temp name is unique
+        # (and outside the preview_*.wav pattern the prune step matches).
+        fd, tmp = tempfile.mkstemp(dir=out.parent, prefix="render_", suffix=".tmp.wav")
+        os.close(fd)
+        try:
+            render_preview_wav_arrays(arrays, Path(tmp), sr=sr)
+            os.replace(tmp, out)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        self._prune_preview_cache(keep=out)
         return out
 
+    def _prune_preview_cache(self, keep: Path) -> None:
+        try:
+            wavs = sorted(keep.parent.glob("preview_*.wav"), key=lambda f: f.stat().st_mtime, reverse=True)
+        except OSError:
+            return
+        for f in wavs[_PREVIEW_CACHE_FILES:]:
+            if f == keep:
+                continue
+            try:
+                f.unlink()
+            except OSError:
+                pass  # still open in the player (Windows); next prune gets it
+
+    def _preview_is_current(self) -> bool:
+        if not self.session or not len(self._current_arrays[0]):
+            return False
+        sr = int(getattr(self.session, "sample_rate", 44100))
+        return self._preview_path(_preview_key(self._current_arrays, sr)).exists()
+
     def play_midi(self) -> None:
-        p = self._ensure_preview_wav(force=False)
-        if not p:
+        if not self.session or not self.current_notes:
+            return
+        if not self._preview_is_current():
+            # Notes changed since the last render: render off the UI thread, then play
             self._log("Preparing MIDI preview…")
+            self._play_after_render = True
             self._kickoff_preview_render()
             return
-
-        # Reset smooth scroll target at start
-        self._last_scroll_target = None
+        p = self._ensure_preview_wav()
 
         self.piano.set_playhead_time(self._notes_t0)
         self.midi_player.setSource(QUrl.fromLocalFile(str(p)))
@@ -961,16 +1402,27 @@ class MainWindow(QMainWindow):
     def stop_midi(self) -> None:
         self.midi_player.stop()
         self.piano.set_playhead_time(None)
-        self._last_scroll_target = None
 
     def _on_midi_dur(self, dur_ms: int) -> None:
         self.slider_midi.setEnabled(dur_ms > 0)
 
     def _on_midi_pos(self, pos_ms: int) -> None:
+        self._sync_seek_slider(self.slider_midi, pos_ms, self.midi_player.duration())
+
+        # Re-anchor the playhead clock; _tick_midi_playhead interpolates between reports
+        self._midi_pos_anchor_ms = pos_ms
+        self._midi_pos_elapsed.restart()
+        if not self._midi_clock.isActive():
+            self._set_midi_playhead(pos_ms)
+
+    def _tick_midi_playhead(self) -> None:
+        pos_ms = self._midi_pos_anchor_ms + self._midi_pos_elapsed.elapsed()
         dur = self.midi_player.duration()
-        if dur > 0 and not self.slider_midi.isSliderDown():
-            self.slider_midi.setValue(int((pos_ms / dur) * 1000))
+        if dur > 0:
+            pos_ms = min(pos_ms, dur)
+        self._set_midi_playhead(pos_ms)
 
+    def _set_midi_playhead(self, pos_ms: int) -> None:
         playhead_time = self._notes_t0 + (pos_ms / 1000.0)
         self.piano.set_playhead_time(playhead_time)
 
@@ -985,10 +1437,18 @@ class MainWindow(QMainWindow):
             self._autoscroll_piano_to_playhead(playhead_time)
 
     def _on_midi_state(self, _state) -> None:
+        state = self.midi_player.playbackState().name
+        # Frame-rate playhead only while actually playing
+        if state == "PlayingState":
+            self._midi_pos_anchor_ms = self.midi_player.position()
+            self._midi_pos_elapsed.restart()
+            self._midi_clock.start()
+        else:
+            self._midi_clock.stop()
+
         # When stopped, clear playhead and reset scroll smoothing
-        if self.midi_player.playbackState().name == "StoppedState":
+        if state == "StoppedState":
             self.piano.set_playhead_time(None)
-            self._last_scroll_target = None
 
     # ---------------- Export MIDI ----------------
     def export_midi_dialog(self) -> None:
@@ -1001,26 +1461,32 @@ class MainWindow(QMainWindow):
             return
 
         try:
+            from app.midi.export_midi import export_midi
+
             export_midi(self.current_notes, Path(out_path), tempo_bpm=int(self.spin_bpm.value()))
             self._log(f"Exported MIDI: {out_path}")
         except Exception as e:
             QMessageBox.critical(self, "Export failed", str(e))
 
 
-    def _start_separation(self, payload: dict) -> None:
+    def _start_separation(self, request: SeparationRequest) -> None:
         """Run Demucs separation in a worker thread (UI stays responsive)."""
-        input_path = (payload.get("input_path") or (getattr(self, 'audio_path', '') or '')).strip()
-        if not input_path and hasattr(self, "lbl_audio_path"):
-            input_path = self.lbl_audio_path.text().strip()
+        input_paths = [p for p in request.input_paths if p]
+        if not input_paths:
+            input_path = (getattr(self, 'audio_path', '') or '').strip()
+            if not input_path and hasattr(self, "lbl_audio_path"):
+                input_path = self.lbl_audio_path.text().strip()
+            if input_path:
+                input_paths = [input_path]
     
-        out_dir = (payload.get("output_dir") or payload.get("out_dir") or payload.get("output") or "").strip()
-        use_subfolder = bool(payload.get("use_subfolder", False))
-        overwrite = bool(payload.get("overwrite", False))
-        model = (payload.get("model") or "htdemucs_6s")
+        out_dir = (request.output_dir or "").strip()
+        use_subfolder = request.use_subfolder
+        overwrite = request.overwrite
+        model = request.model or "htdemucs_6s"
         output_format = "mp3"  # MP3-only (WAV removed)
-        flat_naming = bool(payload.get("flat_naming", True))
+        flat_naming = request.flat_naming
     
-        if not input_path:
+        if not input_paths:
             self._log("❌ No audio loaded. Load an audio file first, then separate.")
             return
         if not out_dir:
@@ -1030,8 +1496,9 @@ class MainWindow(QMainWindow):
         p = Path(out_dir)
         p.mkdir(parents=True, exist_ok=True)
     
-        if use_subfolder:
-            base = Path(input_path).stem
+        # A per-track subfolder only makes sense for a single input
+        if use_subfolder and len(input_paths) == 1:
+            base = Path(input_paths[0]).stem
             p2 = p / base
             if p2.exists() and not overwrite:
                 i = 2
@@ -1059,29 +1526,33 @@ class MainWindow(QMainWindow):
             except Exception:
                 pass
     
-        self._sep_thread = QThread(self)
         self._sep_worker = SeparationWorker(
-            input_path=str(input_path),
+            input_paths=input_paths,
             out_dir=str(p),
             overwrite=overwrite,
             model=str(model),
             output_format=str(output_format),
             flat_naming=flat_naming,
-            mp3_bitrate=int(payload.get("mp3_bitrate") or 320),
-            segment=int(payload.get("segment") or 0),
-            shifts=int(payload.get("shifts") or 0),
-            device=str(payload.get("device") or "auto"),
+            mp3_bitrate=int(request.mp3_bitrate or 320),
+            segment=int(request.segment),
+            shifts=int(request.shifts),
+            device=str(request.device or "auto"),
         )
-        self._sep_worker.moveToThread(self._sep_thread)
-        self._sep_thread.started.connect(self._sep_worker.run)
         self._sep_worker.progress.connect(self._log)
+        if getattr(self, "_sep_win", None) and hasattr(self._sep_win, "set_progress"):
+            self._sep_worker.percent.connect(self._sep_win.set_progress)
         self._sep_worker.finished.connect(self._on_separation_finished)
-        self._sep_worker.finished.connect(self._sep_thread.quit)
-        self._sep_worker.finished.connect(self._sep_worker.deleteLater)
-        self._sep_thread.finished.connect(self._sep_thread.deleteLater)
-        self._sep_thread.start()
+        self._worker_pool.start(_WorkerJob(self._sep_worker))
     
+    def _cancel_separation(self) -> None:
+        # Sets the worker's flag directly; Demucs checks it on its next progress write
+        worker = getattr(self, "_sep_worker", None)
+        if worker is not None:
+            worker.cancel()
+            self._log("Cancelling separation…")
+
     def _on_separation_finished(self, result: dict) -> None:
+        self._sep_worker = None
         ok = bool(result.get("ok"))
         out_dir = str(result.get("out_dir") or "")
         err = result.get("error")
@@ -1146,16 +1617,10 @@ class MainWindow(QMainWindow):
                 pass
     
         # Run in background thread so UI doesn't freeze
-        self._stem_thread = QThread(self)
-        self._stem_worker = TranscribeStemsWorker(stem_paths=stem_paths)
-        self._stem_worker.moveToThread(self._stem_thread)
-        self._stem_thread.started.connect(self._stem_worker.run)
+        self._stem_worker = TranscribeStemsWorker(stem_paths=stem_paths, cache_dir=self._session_cache_dir)
         self._stem_worker.progress.connect(self._log)
         self._stem_worker.finished.connect(lambda res: self._on_stems_transcribed(res, out_dir, export_multitrack))
-        self._stem_worker.finished.connect(self._stem_thread.quit)
-        self._stem_worker.finished.connect(self._stem_worker.deleteLater)
-        self._stem_thread.finished.connect(self._stem_thread.deleteLater)
-        self._stem_thread.start()
+        self._worker_pool.start(_WorkerJob(self._stem_worker))
     
     def _on_stems_transcribed(self, result: dict, out_dir: str, export_multitrack: bool) -> None:
         ok = bool(result.get("ok"))
@@ -1177,29 +1642,13 @@ class MainWindow(QMainWindow):
                     pass
             return
 
-        out_path = Path(out_dir) / "wavenotes_stems.mid"
-    
-        try:
-            if export_multitrack:
-                wrote = self._export_multitrack_midi(notes_by_stem, out_path)
-                if wrote:
-                    self._log(f"✅ Exported multi-track MIDI: {out_path}")
-                else:
-                    # Fallback: separate MID files (still useful)
-                    self._log("⚠ Multi-track export unavailable (mido not installed). Exporting one MID per stem instead.")
-                    for stem, notes in notes_by_stem.items():
-                        export_midi(notes, Path(out_dir) / f"{stem}.mid", tempo_bpm=int(self.spin_bpm.value()))
-                    self._log(f"✅ Exported {len(notes_by_stem)} MIDI file(s) to: {out_dir}")
-            else:
-                merged = []
-                for notes in notes_by_stem.values():
-                    merged.extend(notes)
-                merged.sort(key=lambda n: (n.start_sec, n.midi_pitch))
-                export_midi(merged, out_path, tempo_bpm=int(self.spin_bpm.value()))
-                self._log(f"✅ Exported merged MIDI: {out_path}")
-        except Exception as e:
-            self._log(f"❌ Export failed: {e}")
-            return
+        # Writing the MIDI walks every note of every stem; keep it off the UI thread
+        self._stem_export_job = _StemMidiExportJob(
+            notes_by_stem, Path(out_dir), export_multitrack, int(self.spin_bpm.value())
+        )
+        self._stem_export_job.signals.done.connect(lambda ok, lines: self._on_stem_midi_exported(ok, lines, out_dir))
+        QThreadPool.globalInstance().start(self._stem_export_job)
+
     # Load one stem into the piano roll for preview (vocals preferred)
         pick = None
         for pref in ["vocals", "vocal", "other", "bass", "drums"]:
@@ -1214,80 +1663,39 @@ class MainWindow(QMainWindow):
     
         if pick:
             self.current_notes = notes_by_stem[pick]
-            self._notes_t0 = min((n.start_sec for n in self.current_notes), default=0.0)
             self._update_views()
+            self._notes_t0 = self.piano.time_origin()  # earliest start, from set_notes' arrays
             self._log(f"Preview loaded: {pick} ({len(self.current_notes)} notes)")
-    
-        if getattr(self, "_sep_win", None):
+
+    def _on_stem_midi_exported(self, ok: bool, lines: list, out_dir: str) -> None:
+        self._stem_export_job = None
+        for line in lines:
+            self._log(line)
+        if ok and getattr(self, "_sep_win", None):
             try:
                 self._sep_win.lbl_sep_status.setText(f"Done. MIDI saved in: {out_dir}")
             except Exception:
                 pass
-    
-    def _export_multitrack_midi(self, notes_by_stem: dict, out_path: Path) -> bool:
-        """Write a single MIDI with one track per stem. Returns False if mido isn't available."""
-        try:
-            import mido
-            from mido import Message, MidiFile, MidiTrack, MetaMessage, bpm2tempo
-        except Exception:
-            return False
-    
-        mid = MidiFile(ticks_per_beat=480)
-        tempo = bpm2tempo(int(self.spin_bpm.value()))
-    
-        tempo_track = MidiTrack()
-        tempo_track.append(MetaMessage("set_tempo", tempo=tempo, time=0))
-        mid.tracks.append(tempo_track)
-    
-        ticks_per_sec = (mid.ticks_per_beat * 1_000_000) / tempo
-    
-        def sec_to_ticks(sec: float) -> int:
-            return max(0, int(round(sec * ticks_per_sec)))
-    
-        for stem_name, notes in notes_by_stem.items():
-            tr = MidiTrack()
-            tr.append(MetaMessage("track_name", name=str(stem_name), time=0))
-    
-            events = []
-            for n in notes:
-                on_t = sec_to_ticks(n.start_sec)
-                off_t = sec_to_ticks(n.end_sec)
-                vel = int(getattr(n, "velocity", 96))
-                pitch = int(getattr(n, "midi_pitch", 60))
-                events.append((on_t, True, pitch, vel))
-                events.append((off_t, False, pitch, 0))
-    
-            events.sort(key=lambda e: (e[0], not e[1]))  # note_off first at same tick
-    
-            last = 0
-            for t, is_on, pitch, vel in events:
-                dt = t - last
-                last = t
-                if is_on:
-                    tr.append(Message("note_on", note=pitch, velocity=vel, time=dt))
-                else:
-                    tr.append(Message("note_off", note=pitch, velocity=0, time=dt))
-    
-            mid.tracks.append(tr)
-    
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        mid.save(str(out_path))
-        return True
+
 # ---------------- Cleanup on close ----------------
     def closeEvent(self, event) -> None:
         """Qt close hook: cleanup session temp/cache files before exit."""
+        # Pool threads are joined on exit, so stop what can be stopped
+        self._cancel_analyze()
+        if getattr(self, "_sep_worker", None) is not None:
+            self._sep_worker.cancel()
+
         # Stop players so Windows releases file handles
         try:
             self.midi_player.stop()
             self.audio_player.stop()
+            self.audio_pcm.unload()
         except Exception:
             pass
 
-        # Best-effort cleanup of session cache
-        try:
-            if getattr(self, "_session_cache_dir", None):
-                shutil.rmtree(self._session_cache_dir, ignore_errors=True)
-        except Exception:
-            pass
+        # Best-effort cleanup of session cache, off the UI thread so a large preview
+        # WAV doesn't hold the window open (the global pool is joined at app exit)
+        if getattr(self, "_session_cache_dir", None):
+            QThreadPool.globalInstance().start(_RemoveTreeJob(self._session_cache_dir))
 
         super().closeEvent(event)
\ No newline at end of file
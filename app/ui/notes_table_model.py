@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import numpy as np
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from app.state import NoteArrays
+from app.ui.piano_roll import midi_to_name
+
+
+class NotesTableModel(QAbstractTableModel):
+    """
+    Read-only note list for a QTableView.
+    Columns live in NumPy arrays and cells are formatted on demand, so a refresh is
+    one model reset instead of one QTableWidgetItem per cell.
+    """
+
+    HEADERS = ["Start", "End", "Dur", "Pitch", "Note", "Vel"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._starts = np.empty(0, dtype=np.float64)
+        self._ends = np.empty(0, dtype=np.float64)
+        self._pitches = np.empty(0, dtype=np.int32)
+        self._vels = np.empty(0, dtype=np.int32)
+
+    def set_arrays(self, arrays: NoteArrays) -> None:
+        self.beginResetModel()
+        self._starts, self._ends, self._pitches, self._vels = arrays
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._starts)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        r = index.row()
+        c = index.column()
+        if c == 0:
+            return f"{self._starts[r]:.3f}"
+        if c == 1:
+            return f"{self._ends[r]:.3f}"
+        if c == 2:
+            return f"{self._ends[r] - self._starts[r]:.3f}"
+        if c == 3:
+            return str(self._pitches[r])
+        if c == 4:
+            return midi_to_name(int(self._pitches[r]))
+        if c == 5:
+            return str(self._vels[r])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QObject, QIODevice, QTimer, Signal
+from PySide6.QtMultimedia import QAudioFormat, QAudioSink, QMediaDevices
+
+
+class _PcmDevice(QIODevice):
+    """
+    Read-only, seekable QIODevice over a bytes-like PCM buffer. Unlike QBuffer it
+    reads from the caller's buffer in place instead of copying it into a QByteArray.
+    """
+
+    def __init__(self, data, parent=None):
+        super().__init__(parent)
+        self._data = memoryview(data)
+
+    def isSequential(self) -> bool:
+        return False
+
+    def size(self) -> int:
+        return len(self._data)
+
+    def readData(self, maxlen: int) -> bytes:
+        pos = self.pos()
+        return self._data[pos:pos + maxlen].tobytes()
+
+    def writeData(self, data) -> int:
+        return -1
+
+
+class PcmPlayer(QObject):
+    """
+    Plays interleaved 16-bit PCM held in memory through a QAudioSink.
+
+    Mirrors the part of QMediaPlayer's API the main window uses (play/pause/stop,
+    position/duration/setPosition and their change signals). Seeking is a device
+    seek plus a sink restart, so scrubbing never reopens or demuxes the file.
+    """
+
+    positionChanged = Signal(int)  # ms
+    durationChanged = Signal(int)  # ms
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sink: QAudioSink | None = None
+        self._buffer: _PcmDevice | None = None
+        self._sample_rate = 0
+        self._frame_bytes = 0
+        self._duration_ms = 0
+        self._start_ms = 0  # buffer position (ms) when the sink was last started
+
+        self._tick = QTimer(self)
+        self._tick.setInterval(30)
+        self._tick.timeout.connect(self._emit_position)
+
+    # ---------------- Source ----------------
+    def load(self, pcm, sample_rate: int, channels: int) -> bool:
+        """
+        pcm: interleaved s16 bytes/bytearray; played from in place, so don't modify it.
+        Returns False (and stays unloaded) when the default output device can't play
+        that format, since a QAudioSink would then play nothing without an error.
+        """
+        self.unload()
+
+        fmt = QAudioFormat()
+        fmt.setSampleRate(int(sample_rate))
+        fmt.setChannelCount(int(channels))
+        fmt.setSampleFormat(QAudioFormat.Int16)
+        device = QMediaDevices.defaultAudioOutput()
+        if device.isNull() or not device.isFormatSupported(fmt):
+            return False
+
+        self._sample_rate = int(sample_rate)
+        self._frame_bytes = 2 * int(channels)
+        self._buffer = _PcmDevice(pcm, self)
+        self._buffer.open(QIODevice.ReadOnly)
+        self._sink = QAudioSink(device, fmt, self)
+        self._sink.stateChanged.connect(self._on_state)
+
+        self._start_ms = 0
+        self._duration_ms = len(pcm) * 1000 // (self._frame_bytes * self._sample_rate)
+        self.durationChanged.emit(self._duration_ms)
+        self.positionChanged.emit(0)
+        return True
+
+    def unload(self) -> None:
+        if self._sink is None:
+            return
+        self._tick.stop()
+        self._sink.stateChanged.disconnect(self._on_state)
+        self._sink.stop()
+        self._sink.deleteLater()
+        self._buffer.close()
+        self._buffer.deleteLater()
+        self._sink = None
+        self._buffer = None
+        self._duration_ms = 0
+
+    def isLoaded(self) -> bool:
+        return self._sink is not None
+
+    # ---------------- Transport ----------------
+    def play(self) -> None:
+        if self._sink is None:
+            return
+        if self._state() == "SuspendedState":
+            self._sink.resume()
+        elif self._state() != "ActiveState":
+            if self._buffer.atEnd():
+                self._buffer.seek(0)
+            self._start(self._buffer.pos())
+        self._tick.start()
+
+    def pause(self) -> None:
+        if self._sink is not None and self._state() == "ActiveState":
+            self._sink.suspend()
+            self._tick.stop()
+            self._emit_position()
+
+    def stop(self) -> None:
+        if self._sink is None:
+            return
+        self._tick.stop()
+        self._sink.stop()
+        self._buffer.seek(0)
+        self._start_ms = 0
+        self.positionChanged.emit(0)
+
+    def setPosition(self, pos_ms: int) -> None:
+        if self._sink is None:
+            return
+        pos_ms = max(0, min(int(pos_ms), self._duration_ms))
+        playing = self._state() == "ActiveState"
+        # Stopping drops whatever the sink already buffered from the old position
+        self._sink.stop()
+        offset = pos_ms * self._sample_rate // 1000 * self._frame_bytes
+        self._buffer.seek(offset)
+        self._start_ms = pos_ms
+        if playing:
+            self._start(offset)
+        self.positionChanged.emit(pos_ms)
+
+    def position(self) -> int:
+        if self._sink is None:
+            return 0
+        if self._state() == "StoppedState":
+            return self._start_ms
+        return min(self._duration_ms, self._start_ms + self._sink.processedUSecs() // 1000)
+
+    def duration(self) -> int:
+        return self._duration_ms
+
+    # ---------------- Internals ----------------
+    def _state(self) -> str:
+        # By name: the enum moved from QAudio to QtAudio in Qt 6.7
+        return self._sink.state().name
+
+    def _start(self, offset: int) -> None:
+        self._start_ms = offset // self._frame_bytes * 1000 // self._sample_rate
+        self._sink.start(self._buffer)  # pull mode; processedUSecs restarts at 0
+
+    def _emit_position(self) -> None:
+        self.positionChanged.emit(self.position())
+
+    def _on_state(self, state) -> None:
+        # Idle with the buffer drained means playback reached the end
+        if state.name == "IdleState" and self._buffer is not None and self._buffer.atEnd():
+            self._tick.stop()
+            self._sink.stop()
+            self._start_ms = self._duration_ms
+            self.positionChanged.emit(self._duration_ms)
@@ -1,18 +1,24 @@
 from __future__ import annotations
 
 from typing import List, Optional
+import math
 
-from PySide6.QtCore import Qt, QRectF, QPointF, Signal
-from PySide6.QtGui import QPainter, QPen, QBrush, QFontMetrics
+import numpy as np
+from PySide6.QtCore import Qt, QPoint, QRect, QRectF, QPointF, Signal
+from PySide6.QtGui import QPainter, QPen, QBrush, QFontMetrics, QPixmap
 from PySide6.QtWidgets import QWidget
 
-from app.state import NoteEvent
+from app.state import NoteEvent, NoteArrays, notes_to_arrays
+
+
+_PITCH_CLASSES = ["C","C#","D","D#","E","F","F#","G","G#","A","A#","B"]
+_MIDI_NAMES = tuple(f"{_PITCH_CLASSES[m % 12]}{(m // 12) - 1}" for m in range(128))
 
 
 def midi_to_name(midi: int) -> str:
-    names = ["C","C#","D","D#","E","F","F#","G","G#","A","A#","B"]
-    octave = (midi // 12) - 1
-    return f"{names[midi % 12]}{octave}"
+    if 0 <= midi < 128:
+        return _MIDI_NAMES[midi]
+    return f"{_PITCH_CLASSES[midi % 12]}{(midi // 12) - 1}"
 
 
 class PianoRollWidget(QWidget):
@@ -21,6 +27,13 @@ class PianoRollWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._notes: List[NoteEvent] = []
+        self._notes_ref: Optional[List[NoteEvent]] = None  # list last passed to set_notes
+        # _notes as parallel (starts, ends, pitches, velocities) arrays for painting
+        self._arrays: NoteArrays = notes_to_arrays([])
+        # Hit-test index: note indices ordered by start, their starts, and the longest note
+        self._by_start = np.empty(0, dtype=np.intp)
+        self._starts_sorted = np.empty(0, dtype=np.float64)
+        self._max_note_len = 0.0
         self._selected_index: Optional[int] = None
 
         self.left_margin = 56
@@ -34,34 +47,60 @@ class PianoRollWidget(QWidget):
 
         self._t0 = 0.0
         self._playhead_time: Optional[float] = None  # absolute (same scale as NoteEvent.start_sec)
+        self._playhead_x: Optional[int] = None  # where the playhead was last painted
+        self._grid_key: Optional[tuple] = None
+        self._grid_pixmap: Optional[QPixmap] = None
 
         self.setMouseTracking(True)
         self.setMinimumSize(900, 500)
         self._recompute_virtual_size()
 
-    def set_notes(self, notes: List[NoteEvent]) -> None:
+    def set_notes(self, notes: List[NoteEvent], arrays: Optional[NoteArrays] = None) -> None:
+        """arrays, if given, must be notes_to_arrays(notes); it saves rebuilding them."""
+        if notes is self._notes_ref:
+            return  # same list again (e.g. a cached tweak result): nothing to re-layout
+        self._notes_ref = notes
         self._notes = list(notes) if notes else []
+        self._arrays = arrays if arrays is not None else notes_to_arrays(self._notes)
         self._selected_index = None
 
         if self._notes:
-            self.pitch_min = max(0, min(n.midi_pitch for n in self._notes) - 2)
-            self.pitch_max = min(127, max(n.midi_pitch for n in self._notes) + 2)
-            self._t0 = min(n.start_sec for n in self._notes)
-            t1 = max(n.end_sec for n in self._notes)
+            starts, ends, pitches, _ = self._arrays
+            self.pitch_min = max(0, int(pitches.min()) - 2)
+            self.pitch_max = min(127, int(pitches.max()) + 2)
+            self._t0 = float(starts.min())
+            t1 = float(ends.max())
             self.duration_sec = max(1.0, t1 - self._t0)
+
+            # Notes usually arrive sorted by start already; the stable sort is then cheap
+            self._by_start = np.argsort(starts, kind="stable")
+            self._starts_sorted = starts[self._by_start]
+            self._max_note_len = float((ends - starts).max())
         else:
             self.pitch_min, self.pitch_max = 21, 108
             self.duration_sec = 10.0
             self._t0 = 0.0
+            self._by_start = np.empty(0, dtype=np.intp)
+            self._starts_sorted = np.empty(0, dtype=np.float64)
+            self._max_note_len = 0.0
 
         self._playhead_time = None
+        self._playhead_x = None
         self._recompute_virtual_size()
         self.update()
         self.selectionChanged.emit(None)
 
     def set_playhead_time(self, time_sec: Optional[float]) -> None:
         self._playhead_time = time_sec
-        self.update()
+        # Repaint only the strips the 2 px playhead leaves and enters, not the whole roll
+        new_x = int(self._time_to_x(time_sec)) if time_sec is not None else None
+        old_x = self._playhead_x
+        if new_x == old_x:
+            return
+        self._playhead_x = new_x
+        for x in (old_x, new_x):
+            if x is not None:
+                self.update(QRect(x - 2, 0, 5, self.height()))
 
     def time_origin(self) -> float:
         return float(self._t0)
@@ -84,6 +123,39 @@ class PianoRollWidget(QWidget):
         h = self.px_per_semitone
         return QRectF(x, y, w, h)
 
+    def _grid_tile(self) -> QPixmap:
+        """
+        One second of background grid at full widget height: pitch lines (darker on
+        each C) and time lines every 0.5 s (darker on the second). The grid repeats
+        every second, so paintEvent tiles this instead of drawing ~100 lines.
+        """
+        period = max(1, round(self.px_per_sec))
+        key = (
+            period, self.height(), self.pitch_min, self.pitch_max,
+            self.px_per_semitone, self.top_margin, self.palette().cacheKey(),
+        )
+        if key == self._grid_key:
+            return self._grid_pixmap
+
+        pm = QPixmap(period, max(1, self.height()))
+        pm.fill(self.palette().base().color())
+        p = QPainter(pm)
+        dark_pen = QPen(self.palette().dark().color())
+        grid_pen = QPen(self.palette().mid().color())
+        for pitch in range(self.pitch_min, self.pitch_max + 1):
+            y = int(self._pitch_to_y(pitch))
+            p.setPen(dark_pen if pitch % 12 == 0 else grid_pen)
+            p.drawLine(0, y, period, y)
+        p.setPen(dark_pen)
+        p.drawLine(0, self.top_margin, 0, self.height())
+        p.setPen(grid_pen)
+        p.drawLine(period // 2, self.top_margin, period // 2, self.height())
+        p.end()
+
+        self._grid_key = key
+        self._grid_pixmap = pm
+        return pm
+
     def paintEvent(self, event):
         p = QPainter(self)
         p.fillRect(self.rect(), self.palette().base())
@@ -94,54 +166,58 @@ class PianoRollWidget(QWidget):
             return
 
         t0 = self._t0
-        t1 = t0 + self.duration_sec
-
         text_pen = QPen(self.palette().text().color())
-        grid_pen = QPen(self.palette().mid().color())
 
-        # Pitch grid
-        for pitch in range(self.pitch_min, self.pitch_max + 1):
-            y = self._pitch_to_y(pitch)
-            p.setPen(QPen(self.palette().dark().color()) if pitch % 12 == 0 else grid_pen)
-            p.drawLine(self.left_margin, int(y), self.width(), int(y))
+        # Time span of the exposed area; playhead moves only expose a few pixels
+        exposed = event.rect()
+        t_left = t0 + (exposed.left() - self.left_margin) / self.px_per_sec
+        t_right = t0 + (exposed.right() + 1 - self.left_margin) / self.px_per_sec
+
+        # Pitch + time grid: one cached 1-second tile, blitted across the exposed area
+        grid_area = exposed.intersected(QRect(self.left_margin, 0, self.width() - self.left_margin, self.height()))
+        if not grid_area.isEmpty():
+            tile = self._grid_tile()
+            x_origin = math.floor(self._time_to_x(math.floor(t0)))  # a whole-second line
+            offset = QPoint((grid_area.left() - x_origin) % tile.width(), grid_area.top())
+            p.drawTiledPixmap(grid_area, tile, offset)
 
         # C-note labels
-        p.setPen(text_pen)
-        fm = QFontMetrics(p.font())
-        for pitch in range(self.pitch_min, self.pitch_max + 1):
-            if pitch % 12 == 0:
-                y = self._pitch_to_y(pitch)
-                p.drawText(6, int(y) + fm.ascent(), midi_to_name(pitch))
-
-        # Time grid: 0.5 sec, thicker each 1 sec
-        step = 0.5
-        t = (int(t0 / step)) * step
-        while t < t1 + 1.0:
-            x = self._time_to_x(t)
-            if abs(t - round(t)) < 1e-6:
-                p.setPen(QPen(self.palette().dark().color()))
-            else:
-                p.setPen(grid_pen)
-            p.drawLine(int(x), self.top_margin, int(x), self.height())
-            t += step
-
-        # Notes
+        if exposed.left() < self.left_margin:
+            p.setPen(text_pen)
+            fm = QFontMetrics(p.font())
+            first_c = -(-self.pitch_min // 12) * 12
+            for pitch in range(first_c, self.pitch_max + 1, 12):
+                y = int(self._pitch_to_y(pitch))
+                if y + fm.height() < exposed.top() or y > exposed.bottom():
+                    continue  # label row outside the exposed band
+                p.drawText(6, y + fm.ascent(), midi_to_name(pitch))
+
+        # Notes: cull to the exposed area and lay out in one NumPy pass, then one
+        # batched drawRects; only the selected note gets the rounded outline.
         p.setPen(Qt.NoPen)
         note_brush = QBrush(self.palette().highlight())
         sel_brush = QBrush(self.palette().highlight().color().darker(130))
 
-        for i, n in enumerate(self._notes):
-            r = self._note_rect(n)
-            p.setBrush(sel_brush if i == self._selected_index else note_brush)
-            p.drawRoundedRect(r, 2, 2)
+        starts, ends, pitches, _ = self._arrays
+        visible = (ends >= t_left) & (starts <= t_right)
+        xs = self.left_margin + (starts[visible] - t0) * self.px_per_sec
+        ws = np.maximum(1.0, (ends[visible] - starts[visible]) * self.px_per_sec)
+        ys = self.top_margin + (self.pitch_max - pitches[visible]) * self.px_per_semitone
+        h = self.px_per_semitone
+        p.setBrush(note_brush)
+        p.drawRects([QRectF(x, y, w, h) for x, y, w in zip(xs.tolist(), ys.tolist(), ws.tolist())])
+
+        if self._selected_index is not None:
+            p.setBrush(sel_brush)
+            p.drawRoundedRect(self._note_rect(self._notes[self._selected_index]), 2, 2)
 
         # Left margin border
         p.setPen(QPen(self.palette().text().color()))
         p.drawLine(self.left_margin, 0, self.left_margin, self.height())
 
         # Playhead
-        if self._playhead_time is not None:
-            x = self._time_to_x(self._playhead_time)
+        if self._playhead_x is not None:
+            x = self._playhead_x
             ph_pen = QPen(self.palette().text().color())
             ph_pen.setWidth(2)
             p.setPen(ph_pen)
@@ -152,12 +228,26 @@ class PianoRollWidget(QWidget):
             return
         pos = event.position() if hasattr(event, "position") else QPointF(event.x(), event.y())
 
-        hit = None
-        for i, n in enumerate(self._notes):
-            if self._note_rect(n).contains(pos):
-                hit = i
-                break
+        hit = self._hit_test(pos)
 
         self._selected_index = hit
         self.update()
         self.selectionChanged.emit(self._notes[hit] if hit is not None else None)
+
+    def _hit_test(self, pos: QPointF) -> Optional[int]:
+        """
+        Index of the first note (in list order) whose rect contains pos, found by
+        bisecting the sorted starts and scanning back only as far as the longest
+        note could reach.
+        """
+        t = self._t0 + (pos.x() - self.left_margin) / self.px_per_sec
+        # Notes are drawn at least 1 px wide
+        reach = max(self._max_note_len, 1.0 / self.px_per_sec)
+        lo = int(np.searchsorted(self._starts_sorted, t - reach, side="left"))
+        hi = int(np.searchsorted(self._starts_sorted, t, side="right"))
+
+        hit = None
+        for i in self._by_start[lo:hi].tolist():
+            if (hit is None or i < hit) and self._note_rect(self._notes[i]).contains(pos):
+                hit = i
+        return hit
@@ -1,9 +1,25 @@
 from __future__ import annotations
 from pathlib import Path
+import hashlib
+import os
 import tempfile
 import shutil
 
 
+def file_fingerprint(path: Path, head_bytes: int = 65536) -> str:
+    """
+    Cheap content key for a media file: size + mtime + the first 64 KB.
+    Stable across runs for an unchanged file; changes when the file is rewritten.
+    """
+    st = path.stat()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(st.st_size).encode())
+    h.update(str(st.st_mtime_ns).encode())
+    with path.open("rb") as f:
+        h.update(f.read(head_bytes))
+    return h.hexdigest()
+
+
 class SessionCache:
     """
     Creates a temporary cache folder for this app run.
@@ -22,12 +38,16 @@ class SessionCache:
 
     def clear(self) -> None:
         # Clear files inside the session cache without deleting the folder itself.
-        if self.dir.exists():
-            for p in self.dir.iterdir():
-                try:
-                    if p.is_dir():
-                        shutil.rmtree(p, ignore_errors=True)
-                    else:
-                        p.unlink(missing_ok=True)
-                except Exception:
-                    pass
+        # scandir's entries carry their type from the directory read, so no stat per file.
+        try:
+            with os.scandir(self.dir) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            shutil.rmtree(entry.path, ignore_errors=True)
+                        else:
+                            os.unlink(entry.path)
+                    except OSError:
+                        pass
+        except OSError:
+            pass